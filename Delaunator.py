@@ -1,108 +1,127 @@
 import math
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 EPSILON = math.pow(2, -52)
-EDGE_STACK = [None] * 512
+EDGE_STACK_SIZE = 512
 
 
 class Delaunator:
 
-    def __init__(self, points):
+    def __init__(self, points, stats=False):
         n = len(points)
 
         if len(points) < 3:
             raise ValueError("Need at least 3 points")
-        coords = [None] * n * 2
+        coords = array('d', [0]) * (n * 2)
 
         for i in range(0, n):
             p = points[i]
             coords[2 * i] = (p[0])
             coords[2 * i + 1] = (p[1])
+        self.stats = DelaunatorStats() if stats else None
         triangles = self.constructor(coords)
 
-    def constructor(self, coords):
-        n = len(coords) >> 1
+    @classmethod
+    def from_flat(cls, coords, stats=False):
+        """
+        Triangulate an interleaved [x0, y0, x1, y1, ...] buffer without copying it.
+        :param coords: any indexable float buffer, e.g. array('d'), a memoryview or a NumPy array.
+        :param stats: record per-phase timings and counters in a DelaunatorStats on .stats.
+        :return: the triangulated Delaunator, which keeps a reference to coords.
+        """
+        if len(coords) % 2:
+            raise ValueError("Expected an even number of coordinates")
+        if len(coords) < 6:
+            raise ValueError("Need at least 3 points")
+
+        delaunator = cls.__new__(cls)
+        delaunator.stats = DelaunatorStats() if stats else None
+        delaunator.constructor(coords)
+        return delaunator
 
+    def constructor(self, coords):
         self.coords = coords
+        self._allocate(len(coords) >> 1)
+        triangles = self.update(coords)
 
+        return triangles
+
+    def _allocate(self, n):
         # arrays that will store the triangulation graph
         maxTriangles = max(2 * n - 5, 0)
-        self._triangles = [None] * maxTriangles * 3
-        self._halfedges = [None] * maxTriangles * 3
+        self._triangles = array('i', [0]) * maxTriangles * 3
+        self._halfedges = array('i', [0]) * maxTriangles * 3
 
         # temporary arrays for tracking the edges of the advancing convex hull
         self.hashSize = math.ceil(math.sqrt(n))
-        self.hullPrev = [None] * n  # edge to prev edge
-        self.hullNext = [None] * n  # edge to next edge
-        self.hullTri = [None] * n  # edge to adjacent triangle
-        self.hullHash = [-1] * self.hashSize  # angular edge hash
+        self.hullPrev = array('i', [0]) * n  # edge to prev edge
+        self.hullNext = array('i', [0]) * n  # edge to next edge
+        self.hullTri = array('i', [0]) * n  # edge to adjacent triangle
+        self.hullHash = array('i', [-1]) * self.hashSize  # angular edge hash
 
         # temporary arrays for sorting points
-        self._ids = [None] * n
-        self._dists = [None] * n
-        triangles = self.update(coords)
+        self._ids = array('i', [0]) * n
+        self._dists = array('d', [0]) * n
 
-        return triangles
+        # flip stack for _legalize, kept per instance so separate triangulations never share it
+        self._edgeStack = array('i', [0]) * EDGE_STACK_SIZE
 
     def update(self, coords):
+        """
+        Re-triangulate coords in place, reusing the scratch and mesh arrays of the previous run.
+        They are only reallocated when the number of points changes.
+        """
         n = len(coords) >> 1
 
-        # populate an array of point indices; calculate input data bbox
-        minX = math.inf
-        minY = math.inf
-        maxX = -math.inf
-        maxY = -math.inf
+        if n < 3:
+            raise ValueError("Need at least 3 points")
+        if n != len(self._ids):
+            self._allocate(n)
+        else:
+            self.hullHash[0:self.hashSize] = array('i', [-1]) * self.hashSize
 
-        for i in range(0, n):
-            x = coords[2 * i]
-            y = coords[2 * i + 1]
-            if (x < minX): minX = x
-            if (y < minY): minY = y
-            if (x > maxX): maxX = x
-            if (y > maxY): maxY = y
-            self._ids[i] = i
+        self.coords = coords
+        self.inedges = None
+        self._skipped = None
+        self._touched = None
+        self._lastTri = 0
+        self._grid = None
 
-        cx = (minX + maxX) / 2
-        cy = (minY + maxY) / 2
+        stats = self.stats
+        if stats is not None:
+            stats = self.stats = DelaunatorStats()
+            clock = time.perf_counter()
 
-        minDist = math.inf
-        i0 = 0
-        i1 = 0
-        i2 = 0
+        # populate an array of point indices; calculate input data bbox
+        xs = coords[0:2 * n:2]
+        ys = coords[1:2 * n:2]
+        self._ids[0:n] = array('i', range(n))
 
-        # pick a seed point close to the center
-        for i in range(0, n):
-            d = dist(cx, cy, coords[2 * i], coords[2 * i + 1])
+        cx = (min(xs) + max(xs)) / 2
+        cy = (min(ys) + max(ys)) / 2
 
-            if (d < minDist):
-                i0 = i
-                minDist = d
+        # pick a seed point close to the center
+        dists = distAll(xs, ys, cx, cy)
+        i0 = dists.index(min(dists))
 
         i0x = coords[2 * i0]
         i0y = coords[2 * i0 + 1]
-        minDist = math.inf
 
         # find the point closest to the seed
-        for i in range(0, n):
-            if (i == i0): continue
-            d = dist(i0x, i0y, coords[2 * i], coords[2 * i + 1])
-
-            if (d < minDist and d > 0):
-                i1 = i
-                minDist = d
+        dists = distAll(xs, ys, i0x, i0y)
+        minDist = min((d for d in dists if d > 0), default=math.inf)
+        i1 = dists.index(minDist) if minDist < math.inf else 0
 
         i1x = coords[2 * i1]
         i1y = coords[2 * i1 + 1]
 
-        minRadius = math.inf
-
         # find the third point which forms the smallest circumcircle with the first two
-        for i in range(0, n):
-            if (i == i0 or i == i1): continue
-            r = circumradius(i0x, i0y, i1x, i1y, coords[2 * i], coords[2 * i + 1])
-
-            if (r < minRadius):
-                i2 = i
-                minRadius = r
+        radii = circumradiusAll(xs, ys, i0x, i0y, i1x, i1y)
+        radii[i0] = radii[i1] = math.inf
+        minRadius = min(radii)
+        i2 = radii.index(minRadius) if minRadius < math.inf else 0
 
         i2x = coords[2 * i2]
         i2y = coords[2 * i2 + 1]
@@ -110,10 +129,11 @@ class Delaunator:
         if (minRadius == math.inf):
             # order collinear points by dx (or dy if all x are identical)
             # and return the list as a hull
+            if stats is not None: clock = stats._lap('seed', clock)
             for i in range(0, n):
                 self._dists[i] = (coords[2 * i] - coords[0]) or (coords[2 * i + 1] - coords[1])
 
-            quicksort(self._ids, self._dists, 0, n - 1)
+            fastsort(self._ids, self._dists, 0, n - 1)
             hull = [None] * n
             j = 0
             d0 = -math.inf
@@ -127,8 +147,11 @@ class Delaunator:
                     d0 = self._dists[id]
 
             self.hull = hull[0:j]
-            self.triangles = []
-            self.halfedges = []
+            self.trianglesLen = 0
+            self._trim()
+
+            if stats is not None: stats._lap('hull', clock)
+            return self.triangles
 
         # swap the order of the seed points for counter-clockwise orientation
         if (orient(i0x, i0y, i1x, i1y, i2x, i2y)):
@@ -146,11 +169,14 @@ class Delaunator:
         self._cx = center[0]
         self._cy = center[1]
 
-        for i in range(0, n):
-            self._dists[i] = dist(coords[2 * i], coords[2 * i + 1], center[0], center[1])
+        self._dists[0:n] = distAll(xs, ys, center[0], center[1])
+
+        if stats is not None: clock = stats._lap('seed', clock)
 
         # sort the points by distance from the seed triangle circumcenter
-        quicksort(self._ids, self._dists, 0, n - 1)
+        fastsort(self._ids, self._dists, 0, n - 1)
+
+        if stats is not None: clock = stats._lap('sort', clock)
 
         # set up the seed triangle as the starting hull
         self._hullStart = i0
@@ -180,7 +206,9 @@ class Delaunator:
             y = coords[2 * i + 1]
 
             # skip near-duplicate points
-            if (k > 0 and abs(x - xp) <= EPSILON and abs(y - yp) <= EPSILON): continue
+            if (k > 0 and abs(x - xp) <= EPSILON and abs(y - yp) <= EPSILON):
+                if stats is not None: stats.skipped += 1
+                continue
 
             xp = x
             yp = y
@@ -208,10 +236,12 @@ class Delaunator:
                     e = -1
                     break
 
-            if (e == -1): continue  # likely a near-duplicate point; skip it
+            if (e == -1):  # likely a near-duplicate point; skip it
+                if stats is not None: stats.skipped += 1
+                continue
 
             # add the first triangle from the point
-            t = self._addTriangle(e, i, self.hullNext[e], -1, -1, self.hullTri[e])
+            t = first = self._addTriangle(e, i, self.hullNext[e], -1, -1, self.hullTri[e])
 
             # recursively flip triangles from the point until they satisfy the Delaunay condition
             self.hullTri[i] = self._legalize(t + 2, coords)
@@ -251,6 +281,13 @@ class Delaunator:
             self.hullHash[self._hashKey(x, y)] = i
             self.hullHash[self._hashKey(coords[2 * e], coords[2 * e + 1])] = e
 
+            if stats is not None:
+                stats.inserted += 1
+                stats.hashProbes += j + 1
+                stats.hullWalk += (self.trianglesLen - first) // 3
+
+        if stats is not None: clock = stats._lap('sweep', clock)
+
         self.hull = [None] * hullSize
         e = self._hullStart
         for i in range(0, hullSize):
@@ -258,19 +295,433 @@ class Delaunator:
             e = self.hullNext[e]
 
         # trim typed triangle mesh arrays
-        self.triangles = self._triangles[0:self.trianglesLen]
-        self.halfedges = self._halfedges[0:self.trianglesLen]
+        self._trim()
+
+        if stats is not None: stats._lap('hull', clock)
 
         return self.triangles
 
+    def __getstate__(self):
+        # memoryviews can't be pickled, the trimmed views are rebuilt from the mesh arrays instead
+        state = self.__dict__.copy()
+        del state['triangles']
+        del state['halfedges']
+        if isinstance(self.coords, memoryview):
+            state['coords'] = array('d', self.coords)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._trim()
+
+    def _trim(self):
+        # expose the used part of the mesh arrays as views, without copying them
+        self.triangles = memoryview(self._triangles)[0:self.trianglesLen]
+        self.halfedges = memoryview(self._halfedges)[0:self.trianglesLen]
+
+    # ---- incremental editing ---- #
+    def insert(self, i):
+        """
+        Add point i, which must already be written to coords, to the triangulation using local edge flips.
+        Points outside the current hull, or on one of its edges, fall back to a full update.
+        :param i: the index of the point in coords.
+        :return: a sorted list of the ids of the triangles that changed.
+        """
+        coords = self.coords
+        x = coords[2 * i]
+        y = coords[2 * i + 1]
+        self.findInedges()
+
+        if self.inedges[i] != -1:
+            raise ValueError("Point %d is already in the triangulation" % i)
+
+        t = self._walk(self._lastTri, x, y)
+        if (t == -1): return self._rebuild()
+
+        a = self._triangles[3 * t]
+        b = self._triangles[3 * t + 1]
+        c = self._triangles[3 * t + 2]
+
+        # skip near-duplicate points, the same as the sweep does
+        for p in (a, b, c):
+            if (abs(x - coords[2 * p]) <= EPSILON and abs(y - coords[2 * p + 1]) <= EPSILON):
+                self._skipped.add(i)
+                return []
+
+        h0 = self._halfedges[3 * t]
+        h1 = self._halfedges[3 * t + 1]
+        h2 = self._halfedges[3 * t + 2]
+
+        # a point on a hull edge would be split into a zero-area triangle, it has to join the hull instead
+        for e, h in ((3 * t, h0), (3 * t + 1, h1), (3 * t + 2, h2)):
+            if (h != -1): continue
+            p = self._triangles[e]
+            q = self._triangles[nextHalfedge(e)]
+            if not orient(coords[2 * p], coords[2 * p + 1], coords[2 * q], coords[2 * q + 1], x, y) and \
+                    not orient(coords[2 * q], coords[2 * q + 1], coords[2 * p], coords[2 * p + 1], x, y):
+                return self._rebuild()
+
+        # split [a, b, c] into [a, b, i], [b, c, i] and [c, a, i], reusing the slot of the first
+        self._reserve(6)
+        t1 = self._addTriangle(b, c, i, h1, -1, -1)
+        t2 = self._addTriangle(c, a, i, h2, -1, t1 + 1)
+        self._triangles[3 * t + 2] = i
+        self._link(3 * t + 1, t1 + 2)
+        self._link(3 * t + 2, t2 + 1)
+
+        if (h1 == -1): self.hullTri[b] = t1
+        if (h2 == -1): self.hullTri[c] = t2
+
+        self._skipped.discard(i)
+        self._touched = {t, t1 // 3, t2 // 3}
+        self._legalize(3 * t, coords)
+        self._legalize(t1, coords)
+        self._legalize(t2, coords)
+
+        return self._finishEdit()
+
+    def remove(self, i):
+        """
+        Take point i out of the triangulation, re-triangulating the hole it leaves in place.
+        The point stays in coords, so a later full update brings it back.
+        :param i: the index of the point in coords.
+        :return: a sorted list of the ids of the triangles that changed.
+        """
+        self.findInedges()
+        start = self.inedges[i]
+
+        if (start == -1): return []  # skipped as a near-duplicate, nothing to remove
+        if (self._halfedges[start] == -1):
+            raise ValueError("Can't remove point %d, it is on the convex hull" % i)
+
+        coords = self.coords
+        triangles = self._triangles
+        halfedges = self._halfedges
+
+        # walk the star of i; the triangle of incoming edge e is [a, i, c] with outer edge c -> a
+        slots = []
+        polygon = []
+        sides = {}
+        e = start
+        while True:
+            slots.append(e // 3)
+            outer = prevHalfedge(e)
+            polygon.append(triangles[outer])
+            sides[triangles[outer], triangles[e]] = halfedges[outer]
+            e = halfedges[nextHalfedge(e)]
+            if (e == start): break
+
+        # the hole's sides run backwards around i; incoming edges held by the star have to be found again
+        polygon.reverse()
+        for p in polygon:
+            if (self.inedges[p] // 3 in slots): self.inedges[p] = -1
+
+        # ear-clip the hole, preferring ears whose circumcircle holds no other hole vertex
+        new = []
+        diagonals = []
+        while len(polygon) > 3:
+            k = self._findEar(polygon)
+            u = polygon[k - 1]
+            v = polygon[k]
+            w = polygon[(k + 1) % len(polygon)]
+            new.append((u, v, w))
+            del polygon[k]
+        new.append(tuple(polygon))
+
+        slots.sort()
+        for s, (u, v, w) in zip(slots, new):
+            t = 3 * s
+            triangles[t] = u
+            triangles[t + 1] = v
+            triangles[t + 2] = w
+            for edge, key in ((t, (u, v)), (t + 1, (v, w)), (t + 2, (w, u))):
+                if key in sides:
+                    twin = sides.pop(key)
+                    self._link(edge, twin)
+                    if (twin == -1): self.hullTri[key[0]] = edge
+                else:
+                    # a diagonal, linked once the triangle on its other side is written
+                    sides[key[1], key[0]] = edge
+                    diagonals.append(edge)
+
+        self._touched = set(slots[0:len(new)])
+        for edge in diagonals:
+            self._legalize(edge, coords)
+
+        # close the gap the two freed triangles leave in the mesh arrays
+        for s in reversed(slots[len(new):]):
+            last = self.trianglesLen // 3 - 1
+            if (s != last): self._moveTriangle(last, s)
+            self._touched.discard(last)
+            self.trianglesLen -= 3
+
+        self.inedges[i] = -1
+        return self._finishEdit()
+
+    def move(self, i, x, y):
+        """
+        Move point i to (x, y), writing the new position to coords.
+        Points on, or moving outside, the convex hull fall back to a full update.
+        A point moved onto another is left out as a near-duplicate, it comes back once that point moves away.
+        :return: a sorted list of the ids of the triangles that changed.
+        """
+        self.findInedges()
+        start = self.inedges[i]
+
+        if (start != -1 and self._halfedges[start] == -1):
+            self.coords[2 * i] = x
+            self.coords[2 * i + 1] = y
+            return self._rebuild()
+
+        old_x = self.coords[2 * i]
+        old_y = self.coords[2 * i + 1]
+        changed = set(self.remove(i))
+        if changed: self._lastTri = min(changed)
+
+        self.coords[2 * i] = x
+        self.coords[2 * i + 1] = y
+        changed.update(self.insert(i))
+        if self.inedges is None: return sorted(changed)  # fell back to a full update
+
+        # points skipped as duplicates of i at its old position have room again
+        coords = self.coords
+        for s in [s for s in self._skipped if s != i and abs(coords[2 * s] - old_x) <= EPSILON and
+                  abs(coords[2 * s + 1] - old_y) <= EPSILON]:
+            inserted = self.insert(s)
+            if self.inedges is None: return inserted
+            changed.update(inserted)
+
+        return sorted(changed)
+
+    def _rebuild(self):
+        self.update(self.coords)
+        return list(range(self.trianglesLen // 3))
+
+    def findInedges(self):
+        """
+        The incoming half-edge of every point, preferring hull edges so walks around a point start there.
+        Built once per triangulation and kept up to date by the incremental edits.
+        :return: an array('i') indexed by point, -1 for points left out of the triangulation.
+        """
+        n = len(self.coords) >> 1
+
+        if self.inedges is None:
+            self.inedges = array('i', [-1]) * n
+            for e in range(0, self.trianglesLen):
+                p = self._triangles[nextHalfedge(e)]
+                if (self.inedges[p] == -1 or self._halfedges[e] == -1):
+                    self.inedges[p] = e
+            self._skipped = {p for p in range(n) if self.inedges[p] == -1}
+
+        elif len(self.inedges) < n:
+            self.inedges.extend(array('i', [-1]) * (n - len(self.inedges)))
+
+        return self.inedges
+
+    def _finishEdit(self):
+        # repoint the incoming edges of every point on a changed triangle
+        triangles = self._triangles
+        halfedges = self._halfedges
+        touched = self._touched
+        self._touched = None
+
+        stale = set()
+        for t in touched:
+            for e in range(3 * t, 3 * t + 3):
+                p = triangles[e]
+                inedge = self.inedges[p]
+                if (inedge == -1 or inedge // 3 in touched or inedge >= self.trianglesLen):
+                    stale.add(p)
+
+        for p in stale:
+            self.inedges[p] = -1
+
+        for t in touched:
+            for e in range(3 * t, 3 * t + 3):
+                p = triangles[nextHalfedge(e)]
+                if (p in stale and (self.inedges[p] == -1 or halfedges[e] == -1)):
+                    self.inedges[p] = e
+
+        self._trim()
+        changed = sorted(touched)
+        if changed: self._lastTri = changed[-1]
+        return changed
+
+    def _walk(self, t, x, y):
+        # visibility walk from triangle t to the triangle holding (x, y), or -1 if it is outside the hull
+        coords = self.coords
+        triangles = self._triangles
+        halfedges = self._halfedges
+
+        if (self.trianglesLen == 0): return -1
+        if (t * 3 >= self.trianglesLen): t = 0
+
+        for _ in range(0, self.trianglesLen // 3 + 1):
+            for e in range(3 * t, 3 * t + 3):
+                p = triangles[e]
+                q = triangles[nextHalfedge(e)]
+                if orient(coords[2 * p], coords[2 * p + 1], coords[2 * q], coords[2 * q + 1], x, y): break
+            else:
+                return t
+
+            if (halfedges[e] == -1): return -1
+            t = halfedges[e] // 3
+
+        return -1
+
+    def _findEar(self, polygon):
+        coords = self.coords
+        size = len(polygon)
+        fallback = 0
+
+        for k in range(0, size):
+            u = polygon[k - 1]
+            v = polygon[k]
+            w = polygon[(k + 1) % size]
+            ux = coords[2 * u]
+            uy = coords[2 * u + 1]
+            vx = coords[2 * v]
+            vy = coords[2 * v + 1]
+            wx = coords[2 * w]
+            wy = coords[2 * w + 1]
+
+            # [u, v, w] has to wind the same way as the mesh triangles
+            if not orient(wx, wy, vx, vy, ux, uy): continue
+            fallback = k
+
+            for p in polygon:
+                if (p == u or p == v or p == w): continue
+                if inCircle(ux, uy, vx, vy, wx, wy, coords[2 * p], coords[2 * p + 1]): break
+            else:
+                return k
+
+        return fallback
+
+    def _reserve(self, extra):
+        # grow the mesh arrays; views handed out earlier keep the old buffers alive
+        size = len(self._triangles)
+        if (self.trianglesLen + extra > size):
+            grow = array('i', [0]) * max(size, extra)
+            self._triangles = self._triangles + grow
+            self._halfedges = self._halfedges + grow
+
+    def _moveTriangle(self, src, dst):
+        for k in range(0, 3):
+            a = 3 * src + k
+            b = 3 * dst + k
+            self._triangles[b] = self._triangles[a]
+            twin = self._halfedges[a]
+            self._link(b, twin)
+
+            if (twin == -1): self.hullTri[self._triangles[a]] = b
+            p = self._triangles[nextHalfedge(a)]
+            if (self.inedges[p] == a): self.inedges[p] = b
+
+        self._touched.discard(src)
+        self._touched.add(dst)
+
+    # ---- point location ---- #
+    def locate(self, x, y):
+        """
+        Find the triangle containing (x, y) and the point nearest to it, with a jump-and-walk over the halfedges.
+        The walk starts from a coarse grid of seed triangles, or from the last hit where the grid cell is empty.
+        :return: the triangle id, -1 outside the hull, and the index of the nearest point.
+        """
+        if (self.trianglesLen == 0):
+            # collinear input; every distinct point is on the hull
+            return -1, min(self.hull, key=lambda p: dist(x, y, self.coords[2 * p], self.coords[2 * p + 1]))
+
+        self.findInedges()
+        if self._grid is None: self._buildGrid()
+
+        t = self._walk(self._seedTriangle(x, y), x, y)
+        if (t != -1): self._lastTri = t
+
+        start = self._triangles[3 * t] if t != -1 else self.hull[0]
+        return t, self._nearest(start, x, y)
+
+    def locateMany(self, coords):
+        """
+        Locate every point of an interleaved [x0, y0, x1, y1, ...] buffer.
+        :return: an array('i') of containing triangles and an array('i') of nearest points.
+        """
+        n = len(coords) >> 1
+        triangles = array('i', [-1]) * n
+        nearest = array('i', [-1]) * n
+
+        for i in range(0, n):
+            triangles[i], nearest[i] = self.locate(coords[2 * i], coords[2 * i + 1])
+
+        return triangles, nearest
+
+    def _buildGrid(self):
+        # seed triangles bucketed by centroid, roughly four triangles per cell
+        coords = self.coords
+        triangles = self._triangles
+        hullX = [coords[2 * p] for p in self.hull]
+        hullY = [coords[2 * p + 1] for p in self.hull]
+
+        size = max(1, int(math.sqrt(self.trianglesLen // 3) / 2))
+        self._gridSize = size
+        self._gridX = min(hullX)
+        self._gridY = min(hullY)
+        self._gridScaleX = size / ((max(hullX) - self._gridX) or 1)
+        self._gridScaleY = size / ((max(hullY) - self._gridY) or 1)
+        self._grid = array('i', [-1]) * (size * size)
+
+        for t in range(0, self.trianglesLen // 3):
+            a = triangles[3 * t]
+            b = triangles[3 * t + 1]
+            c = triangles[3 * t + 2]
+            x = (coords[2 * a] + coords[2 * b] + coords[2 * c]) / 3
+            y = (coords[2 * a + 1] + coords[2 * b + 1] + coords[2 * c + 1]) / 3
+            self._grid[self._gridCell(x, y)] = t
+
+    def _gridCell(self, x, y):
+        size = self._gridSize
+        gx = min(max(int((x - self._gridX) * self._gridScaleX), 0), size - 1)
+        gy = min(max(int((y - self._gridY) * self._gridScaleY), 0), size - 1)
+        return gy * size + gx
+
+    def _seedTriangle(self, x, y):
+        t = self._grid[self._gridCell(x, y)]
+        if (t == -1 or 3 * t >= self.trianglesLen): return self._lastTri
+        return t
+
+    def _nearest(self, i, x, y):
+        # greedy descent over the Delaunay graph, which always reaches the nearest point
+        coords = self.coords
+        triangles = self._triangles
+        halfedges = self._halfedges
+        d = dist(x, y, coords[2 * i], coords[2 * i + 1])
+
+        while True:
+            c = i
+            start = e = self.inedges[i]
+            while True:
+                for q in (triangles[e], triangles[prevHalfedge(e)]):
+                    dq = dist(x, y, coords[2 * q], coords[2 * q + 1])
+                    if (dq < d):
+                        c = q
+                        d = dq
+
+                e = halfedges[nextHalfedge(e)]
+                if (e == -1 or e == start): break
+
+            if (c == i): return i
+            i = c
+
     def _hashKey(self, x, y):
         return math.floor(pseudoAngle(x - self._cx, y - self._cy) * self.hashSize) % self.hashSize
 
     def _legalize(self, a, coords):
         i = 0
         ar = 0
+        touched = self._touched
+        stack = self._edgeStack
+        stats = self.stats
 
-        # recursion eliminated with a fixed-size stack
+        # recursion eliminated with a stack that grows as needed
         while True:
             b = self._halfedges[a]
             """
@@ -296,7 +747,7 @@ class Delaunator:
             if (b == -1):  # convex hull edge
                 if (i == 0): break
                 i -= 1
-                a = EDGE_STACK[i]
+                a = stack[i]
                 continue
 
             b0 = b - b % 3
@@ -315,6 +766,11 @@ class Delaunator:
                 coords[2 * p1], coords[2 * p1 + 1])
 
             if (illegal):
+                if touched is not None:
+                    touched.add(a0 // 3)
+                    touched.add(b0 // 3)
+                if stats is not None: stats.flips += 1
+
                 self._triangles[a] = p1
                 self._triangles[b] = p0
 
@@ -338,15 +794,18 @@ class Delaunator:
 
                 br = b0 + (b + 1) % 3
 
-                # don't worry about hitting the cap: it can only happen on extremely degenerate input
-                if (i < len(EDGE_STACK)):
-                    EDGE_STACK[i] = br
-                    i += 1
+                # only extremely degenerate input gets this deep
+                if (i == len(stack)):
+                    stack = self._edgeStack = stack + array('i', [0]) * len(stack)
+
+                stack[i] = br
+                i += 1
+                if stats is not None and i > stats.edgeStackHighWater: stats.edgeStackHighWater = i
 
             else:
                 if (i == 0): break
                 i -= 1
-                a = EDGE_STACK[i]
+                a = stack[i]
 
         return ar
 
@@ -372,6 +831,69 @@ class Delaunator:
         return t
 
 
+class DelaunatorStats:
+    """
+    Timings and hot-path counters of a Delaunator run, filled in when it is created with stats=True.
+    Counters keep accumulating through incremental edits until the next update.
+    """
+
+    def __init__(self):
+        self.phases = {}  # wall time in seconds of 'seed', 'sort', 'sweep' and 'hull'
+        self.inserted = 0  # points added by the hull sweep
+        self.skipped = 0  # near-duplicate points the sweep skipped
+        self.hashProbes = 0  # hull hash slots probed to find a visible edge
+        self.hullWalk = 0  # hull edges walked, one for every triangle the sweep added
+        self.flips = 0  # edges flipped by _legalize
+        self.edgeStackHighWater = 0  # deepest the flip stack got
+
+    @property
+    def probesPerInsert(self):
+        return self.hashProbes / self.inserted if self.inserted else 0
+
+    @property
+    def hullWalkPerInsert(self):
+        return self.hullWalk / self.inserted if self.inserted else 0
+
+    def _lap(self, phase, clock):
+        now = time.perf_counter()
+        self.phases[phase] = now - clock
+        return now
+
+    def __repr__(self):
+        phases = ", ".join("%s=%.4fs" % item for item in self.phases.items())
+        return ("DelaunatorStats(%s, inserted=%d, skipped=%d, probes/insert=%.2f, hull walk/insert=%.2f, "
+                "flips=%d, edge stack high-water=%d)" % (phases, self.inserted, self.skipped, self.probesPerInsert,
+                                                         self.hullWalkPerInsert, self.flips, self.edgeStackHighWater))
+
+
+def triangulate_many(point_sets, workers=None, processes=True, flat=False):
+    """
+    Triangulate independent point sets in parallel. A single Delaunator is not thread-safe,
+    but separate instances share no state, so each set gets its own.
+    :param point_sets: lists of [x, y] points, or interleaved coordinate buffers when flat is set.
+    Memoryview buffers are copied to array('d') for a process pool, as memoryviews can't be pickled.
+    :param workers: the pool size, defaults to the number of cores.
+    :param processes: use a process pool (every core) rather than a thread pool (shares the GIL).
+    :param flat: pass each set to Delaunator.from_flat instead of Delaunator.
+    :return: a list of Delaunator, in the order of point_sets.
+    """
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    build = Delaunator.from_flat if flat else Delaunator
+    if processes:
+        point_sets = [array('d', points) if isinstance(points, memoryview) else points for points in point_sets]
+
+    with executor(max_workers=workers) as pool:
+        return list(pool.map(build, point_sets))
+
+
+def nextHalfedge(e):
+    return e - 2 if e % 3 == 2 else e + 1
+
+
+def prevHalfedge(e):
+    return e + 2 if e % 3 == 0 else e - 1
+
+
 # monotonically increases with real angle, but doesn't need expensive trigonometry
 def pseudoAngle(dx, dy):
     p = dx / (abs(dx) + abs(dy))
@@ -431,7 +953,11 @@ def circumradius(ax, ay, bx, by, cx, cy):
 
     bl = dx * dx + dy * dy
     cl = ex * ex + ey * ey
-    d = 0.5 / (dx * ey - dy * ex)
+    det = dx * ey - dy * ex
+
+    # collinear points have no circumcircle
+    if (det == 0): return math.inf
+    d = 0.5 / det
 
     x = (ey * bl - dy * cl) * d
     y = (dx * cl - ex * bl) * d
@@ -439,6 +965,42 @@ def circumradius(ax, ay, bx, by, cx, cy):
     return x * x + y * y
 
 
+# batched kernels: the same arithmetic as dist and circumradius, run over every point in one call
+
+def distAll(xs, ys, x, y):
+    dists = array('d', [0]) * len(xs)
+    i = 0
+    for px, py in zip(xs, ys):
+        dx = px - x
+        dy = py - y
+        dists[i] = dx * dx + dy * dy
+        i += 1
+
+    return dists
+
+
+def circumradiusAll(xs, ys, ax, ay, bx, by):
+    dx = bx - ax
+    dy = by - ay
+    bl = dx * dx + dy * dy
+    radii = array('d', [math.inf]) * len(xs)
+    i = 0
+    for px, py in zip(xs, ys):
+        ex = px - ax
+        ey = py - ay
+        det = dx * ey - dy * ex
+
+        if (det != 0):
+            cl = ex * ex + ey * ey
+            d = 0.5 / det
+            x = (ey * bl - dy * cl) * d
+            y = (dx * cl - ex * bl) * d
+            radii[i] = x * x + y * y
+        i += 1
+
+    return radii
+
+
 def circumcenter(ax, ay, bx, by, cx, cy):
     dx = bx - ax
     dy = by - ay
@@ -455,61 +1017,7 @@ def circumcenter(ax, ay, bx, by, cx, cy):
     return x, y
 
 
-def quicksort(ids, dists, left, right):
-    if right - left <= 20:
-        for i in range(left + 1, right + 1):
-            temp = ids[i]
-            tempDist = dists[temp]
-            j = i - 1
-            while j >= left and dists[ids[j]] > tempDist:
-                ids[j + 1] = ids[j]
-                j -= 1
-            ids[j + 1] = temp
-
-    else:
-        median = (left + right) >> 1
-        i = left + 1
-        j = right
-        swap(ids, median, i)
-
-        if dists[ids[left]] > dists[ids[right]]:
-            swap(ids, left, right)
-
-        if dists[ids[i]] > dists[ids[right]]:
-            swap(ids, i, right)
-
-        if dists[ids[left]] > dists[ids[i]]:
-            swap(ids, left, i)
-
-        temp = ids[i]
-        tempDist = dists[temp]
-
-        while True:
-            while True:
-                i += 1
-                if dists[ids[i]] >= tempDist: break
-
-            while True:
-                j -= 1
-                if dists[ids[j]] <= tempDist: break
-
-            if j < i:
-                break
-            swap(ids, i, j)
-
-        ids[left + 1] = ids[j]
-        ids[j] = temp
-
-        if right - i + 1 >= j - left:
-            quicksort(ids, dists, i, right)
-            quicksort(ids, dists, left, j - 1)
-
-        else:
-            quicksort(ids, dists, left, j - 1)
-            quicksort(ids, dists, i, right)
-
+# order ids[left..right] by dists[id] with the C sort; stable, so equal distances keep their id order
+def fastsort(ids, dists, left, right):
+    ids[left:right + 1] = array('i', sorted(ids[left:right + 1], key=dists.__getitem__))
 
-def swap(arr, i, j):
-    tmp = arr[i]
-    arr[i] = arr[j]
-    arr[j] = tmp
@@ -0,0 +1,179 @@
+"""
+Benchmarks Delaunator triangulation time and peak memory across input sizes and point distributions.
+
+    python bench_delaunator.py --sizes 1000 10000 --output bench_delaunator.json
+    python bench_delaunator.py --compare bench_delaunator.json
+
+Results are written as JSON so runs from different commits can be compared with --compare.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from array import array
+
+from Delaunator import Delaunator, EPSILON
+
+SIZES = (1000, 10000, 100000, 1000000)
+
+
+# ---- POINT DISTRIBUTIONS ---- #
+def uniform_points(n, rng):
+    return array('d', [rng.uniform(-1, 1) for _ in range(2 * n)])
+
+
+def grid_points(n, rng):
+    # the jittered grid VoronoiMap.load_map starts from: one random point per grid cell
+    side = math.ceil(math.sqrt(n))
+    cell = 2 / side
+    coords = array('d')
+    for i in range(n):
+        low_x = (i % side) * cell - 1
+        low_y = (i // side) * cell - 1
+        coords.append(rng.uniform(low_x, low_x + cell))
+        coords.append(rng.uniform(low_y, low_y + cell))
+    return coords
+
+
+def clustered_points(n, rng):
+    centers = [(rng.uniform(-1, 1), rng.uniform(-1, 1)) for _ in range(max(1, n // 1000))]
+    coords = array('d')
+    for _ in range(n):
+        cx, cy = rng.choice(centers)
+        coords.append(rng.gauss(cx, 0.02))
+        coords.append(rng.gauss(cy, 0.02))
+    return coords
+
+
+def near_duplicate_points(n, rng):
+    # every other point sits within EPSILON of the one before it, so the sweep skips it
+    coords = uniform_points((n + 1) // 2, rng)
+    out = array('d')
+    for i in range(n):
+        p = i // 2
+        offset = EPSILON * rng.random() if i % 2 else 0
+        out.append(coords[2 * p] + offset)
+        out.append(coords[2 * p + 1] + offset)
+    return out
+
+
+def collinear_points(n, rng):
+    # no seed triangle exists, so this takes the minRadius == inf path
+    coords = array('d')
+    for _ in range(n):
+        t = rng.uniform(-1, 1)
+        coords.append(t)
+        coords.append(0.5 * t)
+    return coords
+
+
+SHAPES = {
+    'uniform': uniform_points,
+    'grid': grid_points,
+    'clustered': clustered_points,
+    'near_duplicate': near_duplicate_points,
+    'collinear': collinear_points,
+}
+
+
+# ---- MEASUREMENT ---- #
+def time_triangulation(coords, repeat):
+    seconds = []
+    delaunator = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        delaunator = Delaunator.from_flat(coords)
+        seconds.append(time.perf_counter() - start)
+    return seconds, delaunator
+
+
+def peak_memory(coords):
+    # measured in its own run, tracemalloc slows the triangulation down too much to time it
+    tracemalloc.start()
+    Delaunator.from_flat(coords)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, shapes, repeat, seed, memory):
+    results = []
+    for shape in shapes:
+        for size in sizes:
+            coords = SHAPES[shape](size, random.Random(seed))
+            seconds, delaunator = time_triangulation(coords, repeat)
+            result = {
+                'shape': shape,
+                'size': size,
+                'seconds': seconds,
+                'best': min(seconds),
+                'triangles': len(delaunator.triangles) // 3,
+                'hull': len(delaunator.hull),
+                'peak_bytes': peak_memory(coords) if memory else None,
+            }
+            results.append(result)
+            print("{shape:>15} {size:>8} {best:10.4f}s {triangles:>9} triangles".format(**result)
+                  + ("  {:8.1f} MB".format(result['peak_bytes'] / 1e6) if memory else ""))
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline):
+    old = {(r['shape'], r['size']): r for r in baseline['results']}
+    print("\ncompared to {}:".format(baseline['meta'].get('commit')))
+    for result in report['results']:
+        before = old.get((result['shape'], result['size']))
+        if before is None:
+            continue
+        line = "{:>15} {:>8} time x{:.2f}".format(result['shape'], result['size'], before['best'] / result['best'])
+        if result['peak_bytes'] and before.get('peak_bytes'):
+            line += "  memory x{:.2f}".format(before['peak_bytes'] / result['peak_bytes'])
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--shapes', nargs='+', choices=SHAPES, default=list(SHAPES))
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per case, the best is reported")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="skip the peak memory runs")
+    parser.add_argument('--output', default='bench_delaunator.json')
+    parser.add_argument('--compare', help="a previous JSON report to compare against")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.shapes, args.repeat, args.seed, args.memory)
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(report, json.load(file))
+
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
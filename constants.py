@@ -31,4 +31,4 @@ def mix(x, y, a):
 
 
 def neg_inf_floor(x):
-    return int(x) if x > 0 else int(x)-1
+    return int(x) if x >= 0 or x == int(x) else int(x)-1
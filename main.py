@@ -31,12 +31,10 @@ class MapWindow(arcade.Window):
             self.close()
 
 
-GAME_WINDOW = MapWindow()
-RENDER_VIEW = RenderView()
-
-
 def main():
-    GAME_WINDOW.show_view(RENDER_VIEW)
+    # made here rather than on import, so the heightmap's worker processes don't open windows of their own
+    game_window = MapWindow()
+    game_window.show_view(RenderView())
     arcade.run()
 
 
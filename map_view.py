@@ -1,6 +1,5 @@
 import random
 from array import array
-from PIL import Image
 
 import arcade
 import arcade.gl as gl
@@ -10,24 +9,14 @@ from constants import *
 from voronoi import *
 import perlin
 
+# processes make_perlin_image splits the heightmap across, None uses every core
+HEIGHTMAP_WORKERS = None
 
-def make_perlin_image():
-    tree = perlin.PerlinTree(depth=4)
-    image = Image.new("RGBA", [SCREEN_WIDTH//4, SCREEN_HEIGHT//4])
-    for x in range(image.width):
-        for y in range(image.height):
-            print(x, y)
-            nx = 8*x/480
-            ny = 8*y/270
-            value = perlin.original_perlin_2d(tree, 0, nx, ny)*0.5 + 0.5
-            for i in range(1, tree.depth):
-                i2 = i*2
-                value += perlin.original_perlin_2d(tree, i, nx*i2, ny*i2) / i2
-
-            print(value)
-            image.putpixel([x, y], (int(255*value), int(255*value), int(255*value), 255))
 
-    return image.tobytes()
+def make_perlin_image(workers=None):
+    tree = perlin.PerlinTree(depth=4)
+    return perlin.make_heightmap(tree, SCREEN_WIDTH//4, SCREEN_HEIGHT//4, scale=(8/480, 8/270), octaves=tree.depth,
+                                 kind='perlin', workers=workers or HEIGHTMAP_WORKERS)
 
 
 def load_buffer_triangles(triangle, points):
@@ -42,16 +31,12 @@ def load_buffer_triangles(triangle, points):
                 yield round(rgb_value, 2)
 
 
-def load_buffer_voronoi(data, points, perlin_grid):
+def load_buffer_voronoi(data, voronoi_map):
+    points = voronoi_map.points
     for voronoi_polygon in data:
         base_point = points[voronoi_polygon[0]]
-        print(base_point)
-        elevation = ((perlin.simplex_perlin_2d(perlin_grid[0], 0, *base_point)) + 1)/2
-        moisture = ((perlin.simplex_perlin_2d(perlin_grid[1], 0, *base_point)) + 1)/2
-        for i in range(1, 8):
-            i2 = i*2
-            elevation += perlin.simplex_perlin_2d(perlin_grid[0], 0, base_point[0]*i2, base_point[1]*i2)/i2
-            moisture += perlin.simplex_perlin_2d(perlin_grid[1], 0, base_point[0]*i2, base_point[1]*i2)/i2
+        elevation = voronoi_map.point_elevation[voronoi_polygon[0]]
+        moisture = voronoi_map.point_moisture[voronoi_polygon[0]]
 
         color = (base_point[0]+1.5)/3, (base_point[1]+1.5)/3, 0.5
         prev_point = voronoi_polygon[1][0]
@@ -60,13 +45,37 @@ def load_buffer_voronoi(data, points, perlin_grid):
             for point in triangle:
                 for coord in point:
                     yield coord
-                yield clamp(elevation, 0, 1)
-                yield clamp(moisture, 0, 1)
+                yield elevation
+                yield moisture
             prev_point = vertex
 
 
-def draw_edge(edge, start, end):
-    arcade.draw_line(*expand2d(*start), *expand2d(*end), arcade.color.BLACK)
+class LineBatch:
+    """
+    Uploads a flat float32 [x0, y0, x1, y1, ...] segment array (see find_voronoi_segments) into one line buffer,
+    so the whole wireframe is drawn with a single draw call instead of one arcade.draw_line per edge.
+    """
+
+    def __init__(self, ctx, segments, color=(0.0, 0.0, 0.0, 1.0)):
+        self.ctx = ctx
+        self.program = ctx.load_program(vertex_shader="shaders/line_vertex.glsl",
+                                        fragment_shader="shaders/line_frag.glsl")
+        self.program['line_color'] = color
+
+        self.buffer = ctx.buffer(data=segments)
+        self.geometry = ctx.geometry([gl.BufferDescription(self.buffer, '2f', ['in_vert'])], mode=ctx.LINES)
+        self.vertices = len(segments) // 2
+
+    def write(self, segments):
+        # only reallocate the buffer when the edge count changed
+        if len(segments) * 4 != self.buffer.size:
+            self.buffer.orphan(len(segments) * 4)
+        self.buffer.write(segments)
+        self.vertices = len(segments) // 2
+
+    def draw(self):
+        if self.vertices:
+            self.geometry.render(self.program, vertices=self.vertices)
 
 
 class RenderView(arcade.View):
@@ -97,8 +106,26 @@ class RenderView(arcade.View):
 
         self.filter = False
 
+        # built the first time the wireframe is shown, loading a map is too slow to do at startup
+        self.voronoi_map = None
+        self.wireframe = None
+        self.wireframe_revision = -1
+        self.show_wireframe = False
+
         self.reload()
 
+    def update_wireframe(self):
+        if self.voronoi_map is None:
+            self.voronoi_map = VoronoiMap()
+            self.voronoi_map.load_map()
+
+        # relax, commit and move_point all bump the revision, the buffer is rewritten once per change
+        if self.wireframe is None:
+            self.wireframe = LineBatch(self.window.ctx, self.voronoi_map.voronoi_segments())
+        elif self.wireframe_revision != self.voronoi_map.revision:
+            self.wireframe.write(self.voronoi_map.voronoi_segments())
+        self.wireframe_revision = self.voronoi_map.revision
+
     def reload(self):
         arcade.start_render()
         self.voronoi_screen.use()
@@ -113,6 +140,8 @@ class RenderView(arcade.View):
             self.reload()
         elif symbol == arcade.key.ENTER:
             self.filter = bool(1 - self.filter)
+        elif symbol == arcade.key.W:
+            self.show_wireframe = bool(1 - self.show_wireframe)
 
     def on_mouse_drag(self, x: float, y: float, dx: float, dy: float, _buttons: int, _modifiers: int):
         if _buttons == 2:
@@ -128,4 +157,8 @@ class RenderView(arcade.View):
             self.rect_render_program['x_adjustment'] = self.x_adjustment
             self.voronoi_renderer.render(self.rect_render_program)
 
+        if self.show_wireframe:
+            self.update_wireframe()
+            self.wireframe.draw()
+
         arcade.draw_text(str(self.x_adjustment), SCREEN_HEIGHT / 2, SCREEN_HEIGHT / 2, arcade.color.WHITE)
\ No newline at end of file
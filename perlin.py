@@ -1,7 +1,10 @@
 import random
-import time
 import math
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from math import sqrt
+from array import array
 
 from constants import *
 from vector import Vec2d
@@ -12,7 +15,8 @@ GRADIANT_PERMUTATIONS = (Vec2d(1, 0), Vec2d(sqrt(3)/2, 0.5), Vec2d(sqrt(2)/2, sq
                          Vec2d(-1, 0), Vec2d(-sqrt(3)/2, -0.5), Vec2d(-sqrt(2)/2, -sqrt(2)/2), Vec2d(-0.5, -sqrt(3)/2),
                          Vec2d(0, -1), Vec2d(0.5, -sqrt(3)/2), Vec2d(sqrt(2/2), -sqrt(2)/2), Vec2d(sqrt(3)/2, -0.5))
 
-PERLIN_SEED = (time.time() % 1) * int(time.time())
+# the same gradients as plain (x, y) tuples, for the array noise functions
+GRADIANT_VALUES = tuple(tuple(gradiant) for gradiant in GRADIANT_PERMUTATIONS)
 
 # ---- HELPER FUNCTIONS ---- #
 
@@ -20,19 +24,67 @@ PERLIN_SEED = (time.time() % 1) * int(time.time())
 # ---- PERLIN DATA CLASSES ---- #
 class PerlinTree:
 
-    def __init__(self, seed=1, depth=8):
-        self.seed = math.sin(time.time()*765*seed)/math.tan(time.time()*32*seed) % 1 + 1
+    def __init__(self, seed=None, depth=8, cache_size=0):
+        """
+        :param seed: picks the gradients, the same seed always gives the same noise. A random one when None,
+        kept in self.seed so the noise can be made again.
+        :param depth: the deepest octave.
+        :param cache_size: the most lattice points whose gradients are kept, least recently used go first.
+        Off (0) by default, the permutation hash is cheaper than the cache bookkeeping.
+        """
+        self.seed = random.randrange(2**32) if seed is None else seed
         self.depth = depth
-        self._octaves = {i: {} for i in range(depth)}
+
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache = OrderedDict()
+
+        # a shuffled 0-255 per octave, doubled so permutation[permutation[x] + y] never has to wrap
+        generator = random.Random(self.seed)
+        self._permutations = []
+        for _ in range(depth + 1):
+            permutation = list(range(256))
+            generator.shuffle(permutation)
+            self._permutations.append(permutation * 2)
+
+    def gradient_index(self, depth, x, y):
+        """
+        The index into GRADIANT_PERMUTATIONS of the gradient at integer lattice point (x, y),
+        hashed through the octave's permutation table so it takes no random calls and no storage.
+        """
+        permutation = self._permutations[depth]
+        return permutation[permutation[x & 255] + (y & 255)] % len(GRADIANT_PERMUTATIONS)
+
+    def cached_gradient_index(self, depth, x, y):
+        """
+        gradient_index through the bounded cache, keyed by octave and integer lattice point.
+        """
+        if not self.cache_size:
+            return self.gradient_index(depth, x, y)
+
+        key = depth, x, y
+        index = self._cache.get(key)
+        if index is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return index
+
+        self.misses += 1
+        index = self._cache[key] = self.gradient_index(depth, x, y)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+        return index
+
+    def clear_cache(self):
+        self._cache.clear()
+        self.hits = self.misses = self.evictions = 0
 
     def find_gradient(self, depth, point):
         if depth <= self.depth:
-            octave = self._octaves[depth]
-            seed = (sqrt(PERLIN_SEED**depth)*sum(point)/(point[0] if point[0] else 1))/self.seed
-            random.seed(seed)
-            gradiant = random.choice(GRADIANT_PERMUTATIONS)
-            octave[point] = gradiant
-            return gradiant
+            return GRADIANT_PERMUTATIONS[self.cached_gradient_index(depth, *point)]
         return 0, 1
 
     def __getitem__(self, args):
@@ -42,8 +94,14 @@ class PerlinTree:
         """
         depth = args[0]
         if depth <= self.depth:
-            octave = self._octaves[depth]
-            return tuple(octave.get(arg, self.find_gradient(depth, arg)) for arg in args[1:])
+            return tuple(self.find_gradient(depth, arg) for arg in args[1:])
+
+    def flat_gradients(self, depth, *points):
+        """
+        The gradients at several lattice points as one flat (x0, y0, x1, y1, ...) tuple, for the array noise.
+        These skip the cache, the array noise already looks each cell up once and hashing is cheaper than the cache.
+        """
+        return tuple(value for x, y in points for value in GRADIANT_VALUES[self.gradient_index(depth, x, y)])
 
 
 def simplex_perlin_2d(perlin_tree: PerlinTree, depth: int, x: float, y: float):
@@ -76,26 +134,23 @@ def simplex_perlin_2d(perlin_tree: PerlinTree, depth: int, x: float, y: float):
     x2 = x0 - 1.0 + 2.0 * unskew_factor
     y2 = y0 - 1.0 + 2.0 * unskew_factor
 
-    point0, point1, point2 = perlin_tree[depth, (x0, y0), (x1, y1), (x2, y2)]
+    point0, point1, point2 = perlin_tree[depth, (i, j), (i+i1, j+j1), (i+1, j+1)]
     # noise contribution
-    t0 = 1 - x0**2 - y0**2
-    print(t0)
+    t0 = 0.5 - x0**2 - y0**2
     if t0 < 0:
         n0 = 0
     else:
         t0 *= t0
         n0 = t0 * t0 * point0.dot(Vec2d(x0, y0))
 
-    t1 = 1 - x1**2 - y**2
-    print(t1)
+    t1 = 0.5 - x1**2 - y1**2
     if t1 < 0:
         n1 = 0
     else:
         t1 *= t1
         n1 = t1 * t1 * point1.dot(Vec2d(x1, y1))
 
-    t2 = 1 - x2**2 - y**2
-    print(t2)
+    t2 = 0.5 - x2**2 - y2**2
     if t2 < 0:
         n2 = 0
     else:
@@ -111,21 +166,192 @@ def original_perlin_2d(perlin_tree: PerlinTree, depth: int, x: float, y: float):
     fract_x = x % 1
     fract_y = y % 1
     fract_pos = Vec2d(fract_x, fract_y)
-    print("pos", fract_pos)
     corner_sw, corner_nw, corner_ne, corner_se = perlin_tree[depth,
                                                              (int_x, int_y), (int_x, int_y+1),
                                                              (int_x+1, int_y+1), (int_x+1, int_y)]
 
-    print("corners:", corner_sw, corner_nw, corner_ne, corner_se)
-
     function = fract_pos * fract_pos * fract_pos * (fract_pos*(fract_pos*6-15)+10)
-    print("function", function)
-    print("function breakdown", fract_pos*fract_pos*fract_pos, (fract_pos*(fract_pos*6-15)+10))
 
     north_mix = mix(corner_nw.dot(fract_pos-Vec2d(0, 1)), corner_ne.dot(fract_pos-Vec2d(1, 1)), function.x)
-    print("north:", north_mix)
     south_mix = mix(corner_sw.dot(fract_pos-Vec2d(0, 0)), corner_se.dot(fract_pos-Vec2d(1, 0)), function.x)
-    print("south", south_mix)
     vertical_mix = mix(south_mix, north_mix, function.y)
-    print("mix", vertical_mix)
     return vertical_mix
+
+
+# ---- ARRAY NOISE ---- #
+SKEW_FACTOR = 0.5*(sqrt(3.0)-1)
+UNSKEW_FACTOR = (3.0 - sqrt(3.0))/6.0
+
+
+def perlin_2d_array(perlin_tree: PerlinTree, depth: int, xs, ys):
+    """
+    original_perlin_2d over whole arrays of points, with the same gradients and fade curve but plain float
+    arithmetic and the corner gradients of each lattice cell looked up once.
+    :param xs: the x coords of the points, any sequence of floats.
+    :param ys: the y coords of the points.
+    :return: an array('d') holding the noise value of every point.
+    """
+    return fbm_2d_array([perlin_tree], xs, ys, depth=depth, kind='perlin')[0]
+
+
+def simplex_2d_array(perlin_tree: PerlinTree, depth: int, xs, ys):
+    """
+    simplex_perlin_2d over whole arrays of points, with the same gradients and falloff but plain float
+    arithmetic. Gradients are taken at the integer corners of each simplex and looked up once per simplex.
+    :param xs: the x coords of the points, any sequence of floats.
+    :param ys: the y coords of the points.
+    :return: an array('d') holding the noise value of every point.
+    """
+    return fbm_2d_array([perlin_tree], xs, ys, depth=depth, kind='simplex')[0]
+
+
+def fbm_2d_array(perlin_trees, xs, ys, octaves=1, lacunarity=2.0, gain=0.5, depth=0, kind='simplex',
+                 turbulence=False):
+    """
+    Fractal (fBm) noise for several fields at once, in a single pass over the points.
+    Octave k samples at lacunarity**k times the frequency and gain**k times the amplitude, from octave depth + k
+    of each field's PerlinTree. The lattice cell of a point is found once per octave and shared by every field.
+    :param perlin_trees: one PerlinTree per field, e.g. one for elevation and one for moisture.
+    :param xs: the x coords of the points, any sequence of floats.
+    :param ys: the y coords of the points.
+    :param octaves: how many octaves to sum.
+    :param lacunarity: the frequency multiplier between octaves.
+    :param gain: the amplitude multiplier between octaves.
+    :param depth: the PerlinTree octave the first octave samples.
+    :param kind: 'simplex' or 'perlin'.
+    :param turbulence: sum the absolute value of every octave instead.
+    :return: a list with an array('d') of values for every field.
+    """
+    for perlin_tree in perlin_trees:
+        if depth + octaves - 1 > perlin_tree.depth:
+            raise ValueError("{} octaves from depth {} need a PerlinTree of depth {}, not {}".format(
+                octaves, depth, depth + octaves - 1, perlin_tree.depth))
+    if kind == 'simplex':
+        octave_noise = _simplex_octave
+    elif kind == 'perlin':
+        octave_noise = _perlin_octave
+    else:
+        raise ValueError("unknown noise kind {!r}".format(kind))
+
+    fields = [array('d', [0]) * len(xs) for _ in perlin_trees]
+    # the corner gradients of every cell seen so far, per field and octave
+    cells = [[{} for _ in range(octaves)] for _ in perlin_trees]
+    frequencies = [lacunarity**octave for octave in range(octaves)]
+    amplitudes = [gain**octave for octave in range(octaves)]
+
+    for k in range(len(xs)):
+        x = xs[k]
+        y = ys[k]
+        for octave in range(octaves):
+            octave_noise(perlin_trees, fields, cells, k, octave, depth + octave, x * frequencies[octave],
+                         y * frequencies[octave], amplitudes[octave], turbulence)
+
+    return fields
+
+
+def _perlin_octave(perlin_trees, fields, cells, k, octave, depth, x, y, amplitude, turbulence):
+    int_x = math.floor(x)
+    int_y = math.floor(y)
+    fract_x = x - int_x
+    fract_y = y - int_y
+    fade_x = fract_x * fract_x * fract_x * (fract_x * (fract_x * 6 - 15) + 10)
+    fade_y = fract_y * fract_y * fract_y * (fract_y * (fract_y * 6 - 15) + 10)
+
+    for field in range(len(fields)):
+        field_cells = cells[field][octave]
+        corners = field_cells.get((int_x, int_y))
+        if corners is None:
+            corners = field_cells[int_x, int_y] = perlin_trees[field].flat_gradients(
+                depth, (int_x, int_y), (int_x, int_y+1), (int_x+1, int_y+1), (int_x+1, int_y))
+        sw_x, sw_y, nw_x, nw_y, ne_x, ne_y, se_x, se_y = corners
+
+        north = (nw_x*fract_x + nw_y*(fract_y-1)) * (1-fade_x) + (ne_x*(fract_x-1) + ne_y*(fract_y-1)) * fade_x
+        south = (sw_x*fract_x + sw_y*fract_y) * (1-fade_x) + (se_x*(fract_x-1) + se_y*fract_y) * fade_x
+        value = south * (1-fade_y) + north * fade_y
+        fields[field][k] += amplitude * (abs(value) if turbulence else value)
+
+
+def _simplex_octave(perlin_trees, fields, cells, k, octave, depth, x, y, amplitude, turbulence):
+    # Skew to find our simplex coord
+    skew = (x + y) * SKEW_FACTOR
+    i = math.floor(x + skew)
+    j = math.floor(y + skew)
+    unskew = (i + j) * UNSKEW_FACTOR
+    x0 = x - (i - unskew)
+    y0 = y - (j - unskew)
+    upper = x0 <= y0
+
+    x1 = x0 - (0 if upper else 1) + UNSKEW_FACTOR
+    y1 = y0 - (1 if upper else 0) + UNSKEW_FACTOR
+    x2 = x0 - 1.0 + 2.0 * UNSKEW_FACTOR
+    y2 = y0 - 1.0 + 2.0 * UNSKEW_FACTOR
+
+    # the falloff of each corner, the same for every field
+    t0 = 0.5 - x0*x0 - y0*y0
+    t0 = t0 * t0 * t0 * t0 if t0 > 0 else 0
+    t1 = 0.5 - x1*x1 - y1*y1
+    t1 = t1 * t1 * t1 * t1 if t1 > 0 else 0
+    t2 = 0.5 - x2*x2 - y2*y2
+    t2 = t2 * t2 * t2 * t2 if t2 > 0 else 0
+
+    for field in range(len(fields)):
+        field_cells = cells[field][octave]
+        corners = field_cells.get((i, j, upper))
+        if corners is None:
+            middle = (i, j+1) if upper else (i+1, j)
+            corners = field_cells[i, j, upper] = perlin_trees[field].flat_gradients(depth, (i, j), middle, (i+1, j+1))
+        g0_x, g0_y, g1_x, g1_y, g2_x, g2_y = corners
+
+        # noise contribution
+        value = 70 * (t0 * (g0_x*x0 + g0_y*y0) + t1 * (g1_x*x1 + g1_y*y1) + t2 * (g2_x*x2 + g2_y*y2))
+        fields[field][k] += amplitude * (abs(value) if turbulence else value)
+
+
+# ---- HEIGHTMAPS ---- #
+def make_heightmap(perlin_tree: PerlinTree, width, height, scale=(1, 1), octaves=1, lacunarity=2.0, gain=0.5,
+                   kind='perlin', tile_size=64, workers=None, processes=True):
+    """
+    A greyscale RGBA heightmap of fBm noise, made in tiles across a pool and assembled into one contiguous buffer.
+    Every tile only depends on its own pixels and the tree's seed, so the bytes are the same for any worker count.
+    :param scale: the noise units per pixel across and down.
+    :param octaves: passed on to fbm_2d_array, as are lacunarity, gain and kind.
+    :param tile_size: the width and height of a tile in pixels.
+    :param workers: the pool size, defaults to the number of cores. 1 skips the pool.
+    :param processes: use a process pool (every core) rather than a thread pool (shares the GIL).
+    :return: width * height * 4 bytes, rows top to bottom, ready for ctx.texture.
+    """
+    tiles = [(left, top, min(left + tile_size, width), min(top + tile_size, height))
+             for top in range(0, height, tile_size) for left in range(0, width, tile_size)]
+    render = partial(_heightmap_tile, perlin_tree, scale, octaves, lacunarity, gain, kind)
+
+    if workers == 1:
+        pixels = list(map(render, tiles))
+    else:
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with executor(max_workers=workers) as pool:
+            pixels = list(pool.map(render, tiles))
+
+    image = bytearray(4 * width * height)
+    for (left, top, right, bottom), tile in zip(tiles, pixels):
+        row = 4 * (right - left)
+        for y in range(top, bottom):
+            start = 4 * (y * width + left)
+            image[start:start + row] = tile[(y - top) * row:(y - top + 1) * row]
+
+    return bytes(image)
+
+
+def _heightmap_tile(perlin_tree, scale, octaves, lacunarity, gain, kind, tile):
+    left, top, right, bottom = tile
+    scale_x, scale_y = scale
+    xs = array('d', [x * scale_x for _ in range(top, bottom) for x in range(left, right)])
+    ys = array('d', [y * scale_y for y in range(top, bottom) for _ in range(left, right)])
+    values = fbm_2d_array([perlin_tree], xs, ys, octaves, lacunarity, gain, kind=kind)[0]
+
+    grey = bytes(int(255 * clamp(value * 0.5 + 0.5, 0, 1)) for value in values)
+    pixels = bytearray(4 * len(grey))
+    pixels[0::4] = grey
+    pixels[1::4] = grey
+    pixels[2::4] = grey
+    pixels[3::4] = b'\xff' * len(grey)
+    return pixels
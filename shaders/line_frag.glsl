@@ -0,0 +1,10 @@
+#version 330
+
+uniform vec4 line_color;
+
+out vec4 fragColor;
+
+void main()
+{
+    fragColor = line_color;
+}
\ No newline at end of file
@@ -0,0 +1,8 @@
+#version 330
+
+in vec2 in_vert;
+
+void main()
+{
+    gl_Position = vec4(in_vert, 0, 1);
+}
\ No newline at end of file
@@ -0,0 +1,74 @@
+import random
+from array import array
+
+from Delaunator import Delaunator, triangulate_many
+
+
+def grid_coords(side):
+    coords = array('d')
+    for y in range(side):
+        for x in range(side):
+            coords.extend((float(x), float(y)))
+    return coords
+
+
+def zero_area_triangles(delaunator):
+    coords = delaunator.coords
+    triangles = delaunator.triangles
+    count = 0
+    for t in range(0, len(triangles), 3):
+        a, b, c = triangles[t], triangles[t + 1], triangles[t + 2]
+        ax, ay = coords[2 * a], coords[2 * a + 1]
+        if (coords[2 * b] - ax) * (coords[2 * c + 1] - ay) == (coords[2 * b + 1] - ay) * (coords[2 * c] - ax):
+            count += 1
+    return count
+
+
+def test_move_onto_hull_edge_matches_fresh_triangulation():
+    # grid points moved exactly onto the hull edges have to join the hull, not split a triangle in two
+    side = 10
+    delaunator = Delaunator.from_flat(grid_coords(side))
+    rng = random.Random(1)
+    interior = [p for p in range(side * side) if 0 < p % side < side - 1 and 0 < p // side < side - 1]
+    for k, p in enumerate(interior[:30]):
+        v = rng.randrange(1, side - 1) + 0.5
+        x, y = ((v, 0.0), (v, side - 1.0), (0.0, v), (side - 1.0, v))[k % 4]
+        delaunator.move(p, x, y)
+
+    fresh = Delaunator.from_flat(array('d', delaunator.coords))
+    assert zero_area_triangles(delaunator) == 0
+    assert len(delaunator.triangles) == len(fresh.triangles)
+    assert sorted(delaunator.hull) == sorted(fresh.hull)
+
+
+def test_points_moved_onto_each_other_come_back():
+    # a point moved onto another site is skipped, it has to be re-inserted once that site moves away
+    side = 12
+    delaunator = Delaunator.from_flat(grid_coords(side))
+    rng = random.Random(2)
+    interior = [p for p in range(side * side) if 0 < p % side < side - 1 and 0 < p // side < side - 1]
+    for _ in range(200):
+        p = rng.choice(interior)
+        if rng.random() < 0.5:
+            q = rng.choice(interior)
+            x, y = delaunator.coords[2 * q], delaunator.coords[2 * q + 1]
+        else:
+            x = rng.randrange(2, 2 * side - 3) / 2
+            y = rng.randrange(2, 2 * side - 3) / 2
+        delaunator.move(p, x, y)
+
+    # which of two coincident points is kept may differ, but every position has to be covered
+    coords = delaunator.coords
+    fresh = Delaunator.from_flat(array('d', coords))
+    positions = {(coords[2 * p], coords[2 * p + 1]) for p in range(side * side)}
+    assert {(coords[2 * p], coords[2 * p + 1]) for p in delaunator.triangles} == positions
+    assert len(delaunator.triangles) == len(fresh.triangles)
+    assert zero_area_triangles(delaunator) == 0
+
+
+def test_triangulate_many_accepts_memoryviews():
+    rng = random.Random(3)
+    buffers = [array('d', [rng.uniform(-1, 1) for _ in range(200)]) for _ in range(2)]
+    results = triangulate_many([memoryview(b) for b in buffers], workers=1, flat=True)
+    for buffer, delaunator in zip(buffers, results):
+        assert list(delaunator.triangles) == list(Delaunator.from_flat(buffer).triangles)
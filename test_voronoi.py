@@ -0,0 +1,64 @@
+import math
+import random
+from array import array
+
+import pytest
+
+# voronoi pulls the screen size from arcade through constants
+pytest.importorskip("arcade")
+
+from voronoi import *
+
+
+def test_csr_negative_and_out_of_range_rows():
+    rows = CSR(array('i', [0, 2, 3, 6]), array('i', [1, 2, 3, 4, 5, 6]))
+    assert list(rows[-1]) == [4, 5, 6]
+    assert list(rows[-3]) == [1, 2]
+    with pytest.raises(IndexError):
+        rows[3]
+    with pytest.raises(IndexError):
+        rows[-4]
+
+
+def clipped_random_cells(seed, n, bounds):
+    rng = random.Random(seed)
+    coords = array('d', [rng.uniform(-1, 1) for _ in range(2 * n)])
+    points = FlatPoints(coords)
+    delaunator = Delaunator.from_flat(coords)
+    triangles = delaunator.triangles
+    edges = delaunator.halfedges
+    inedges = delaunator.findInedges()
+    cells = find_voronoi_cells(points, edges, triangles, inedges=inedges)
+    return clip_voronoi_cells(points, edges, triangles, inedges, cells, bounds)
+
+
+@pytest.mark.parametrize('bounds', [(-1, -1, 1, 1), (-0.5, -0.25, 0.75, 0.5), (-3, -2, 2, 4)])
+@pytest.mark.parametrize('n', [3, 5, 40, 400])
+def test_clipped_cells_tile_the_bounds(bounds, n):
+    left, bottom, right, top = bounds
+    clipped = clipped_random_cells(n, n, bounds)
+
+    assert math.isclose(sum(clipped.areas), (right - left) * (top - bottom), rel_tol=1e-9)
+    for p in range(len(clipped)):
+        for x, y in clipped.polygon(p):
+            assert left - 1e-9 <= x <= right + 1e-9 and bottom - 1e-9 <= y <= top + 1e-9
+        if clipped.areas[p]:
+            x, y = clipped.centroids[2 * p], clipped.centroids[2 * p + 1]
+            assert left <= x <= right and bottom <= y <= top
+
+
+def test_poisson_disk_points_keep_their_spacing():
+    spacing = 1.0
+
+    def density(x, y):
+        return 1.0 if x < 20 else 0.1
+
+    coords = poisson_disk_points((0, 0, 40, 40), spacing, density, rng=random.Random(1))
+    n = len(coords) // 2
+    radii = [spacing / max(min(density(coords[2 * s], coords[2 * s + 1]), 1), 0.1) for s in range(n)]
+    assert n > 100
+
+    for a in range(n):
+        for b in range(a + 1, n):
+            distance = math.hypot(coords[2 * a] - coords[2 * b], coords[2 * a + 1] - coords[2 * b + 1])
+            assert distance >= max(radii[a], radii[b]), (a, b)
@@ -1,7 +1,11 @@
 import random
 import math
+import time
+from contextlib import contextmanager
+from array import array
 
 from Delaunator import Delaunator
+from perlin import PerlinTree, fbm_2d_array
 
 from constants import *
 
@@ -45,6 +49,39 @@ def triangle_center(points, triangles, t):
     return circumcenter(*vertices)
 
 
+def find_triangle_centers(points, triangles, changed=None, centers=None):
+    """
+    Compute the circumcenter of every triangle in one pass.
+    :param changed: only recompute these triangles, the rest of centers is kept.
+    :param centers: the array to fill, resized to fit triangles; a new one is made if not given.
+    :return: a flat array('d') of [x0, y0, x1, y1, ...], indexed by triangle.
+    """
+    size = len(triangles) // 3 * 2
+    if centers is None:
+        centers = array('d', [0]) * size
+    elif len(centers) > size:
+        del centers[size:]
+    elif len(centers) < size:
+        centers.extend(array('d', [0]) * (size - len(centers)))
+
+    for t in (range(len(triangles) // 3) if changed is None else changed):
+        ax, ay = points[triangles[3 * t]]
+        bx, by = points[triangles[3 * t + 1]]
+        cx, cy = points[triangles[3 * t + 2]]
+        ad = ax**2 + ay**2
+        bd = bx**2 + by**2
+        cd = cx**2 + cy**2
+        D = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+        centers[2 * t] = 1 / D * (ad * (by - cy) + bd * (cy - ay) + cd * (ay - by))
+        centers[2 * t + 1] = 1 / D * (ad * (cx - bx) + bd * (ax - cx) + cd * (bx - ax))
+
+    return centers
+
+
+def center_of_triangle(centers, t):
+    return centers[2 * t], centers[2 * t + 1]
+
+
 def next_half_edge(e):
     if e % 3 == 2:
         return e-2
@@ -69,6 +106,22 @@ def find_centroid(vertices):
     return centroid_x/len(vertices), centroid_y/len(vertices)
 
 
+def find_inedges(edges, triangles, n):
+    """
+    Index an incoming half-edge for each of n points, preferring hull edges so walks around a point start there.
+    :return: an array('i') indexed by point, -1 for points the triangulation skipped as near-duplicates.
+    """
+    inedges = array('i', [-1]) * n
+    e = 0
+    while e < len(triangles):
+        endpoint = triangles[next_half_edge(e)]
+        if inedges[endpoint] == -1 or edges[e] == -1:
+            inedges[endpoint] = e
+        e += 1
+
+    return inedges
+
+
 def edges_around_point(edges, start):
     result = []
     incoming = start
@@ -83,6 +136,113 @@ def edges_around_point(edges, start):
     return result
 
 
+class FlatPoints:
+    """
+    A read only sequence of (x, y) points backed by an interleaved [x0, y0, x1, y1, ...] buffer,
+    so the helper functions can keep indexing points[p] without a list of lists being built.
+    """
+
+    def __init__(self, coords):
+        self.coords = coords
+
+    def __len__(self):
+        return len(self.coords) >> 1
+
+    def __getitem__(self, p):
+        if p < 0:
+            p += len(self)
+        return self.coords[2 * p], self.coords[2 * p + 1]
+
+    def __iter__(self):
+        coords = self.coords
+        for p in range(len(self)):
+            yield coords[2 * p], coords[2 * p + 1]
+
+
+# ---- SITE GENERATION ---- #
+def poisson_disk_points(bounds, spacing, density=None, attempts=30, rng=random):
+    """
+    Blue noise sites by Bridson's Poisson-disk sampling, in one O(n) pass over a background grid.
+    :param bounds: the (left, bottom, right, top) rectangle to fill.
+    :param spacing: the minimum distance between two sites.
+    :param density: an optional function of (x, y) returning a value in (0, 1], the spacing around (x, y)
+    is divided by it so lower values give sparser sites. Values below 0.1 are treated as 0.1.
+    :param attempts: the candidates tried around a site before it stops spawning new ones.
+    :param rng: the random.Random (or the random module) to draw from.
+    :return: a flat array('d') of [x0, y0, x1, y1, ...].
+    """
+    left, bottom, right, top = bounds
+    # a cell this size holds at most one site, since no two sites are closer than spacing
+    cell = spacing / math.sqrt(2)
+    columns = int((right - left) / cell) + 1
+    rows = int((top - bottom) / cell) + 1
+    grid = array('i', [-1]) * (columns * rows)
+
+    coords = array('d')
+    radii = array('d')
+    active = []
+    reach = 1
+
+    def radius_at(x, y):
+        if density is None:
+            return spacing
+        return spacing / max(min(density(x, y), 1), 0.1)
+
+    def add(x, y, r):
+        nonlocal reach
+        s = len(radii)
+        coords.append(x)
+        coords.append(y)
+        radii.append(r)
+        grid[int((y - bottom) / cell) * columns + int((x - left) / cell)] = s
+        active.append(s)
+        reach = max(reach, math.ceil(r / cell))
+
+    def is_free(x, y, r):
+        column = int((x - left) / cell)
+        row = int((y - bottom) / cell)
+        # reach covers the largest radius placed so far, the candidate's own may be larger still
+        window = max(reach, math.ceil(r / cell))
+        for j in range(max(row - window, 0), min(row + window + 1, rows)):
+            for i in range(max(column - window, 0), min(column + window + 1, columns)):
+                s = grid[j * columns + i]
+                if s != -1:
+                    dx = coords[2 * s] - x
+                    dy = coords[2 * s + 1] - y
+                    limit = max(r, radii[s])
+                    if dx * dx + dy * dy < limit * limit:
+                        return False
+        return True
+
+    x = rng.uniform(left, right)
+    y = rng.uniform(bottom, top)
+    add(x, y, radius_at(x, y))
+
+    while active:
+        a = rng.randrange(len(active))
+        s = active[a]
+        sx = coords[2 * s]
+        sy = coords[2 * s + 1]
+        r = radii[s]
+        for _ in range(attempts):
+            angle = rng.uniform(0, math.tau)
+            distance = rng.uniform(r, 2 * r)
+            x = sx + distance * math.cos(angle)
+            y = sy + distance * math.sin(angle)
+            if not (left <= x < right and bottom <= y < top):
+                continue
+            candidate = radius_at(x, y)
+            if is_free(x, y, candidate):
+                add(x, y, candidate)
+                break
+        else:
+            # no room left around this site
+            active[a] = active[-1]
+            active.pop()
+
+    return coords
+
+
 # ---- FOR FUNCTIONS ---- #
 def for_each_triangle_edge(points, edges, triangles, next_func):
     e = 0
@@ -101,91 +261,452 @@ def for_each_triangle(points, triangles, next_func):
         t += 1
 
 
-def for_each_voronoi_edge(points, edges, triangle, next_func):
+def for_each_voronoi_edge(points, edges, triangle, next_func, centers=None):
+    if centers is None:
+        centers = find_triangle_centers(points, triangle)
     e = 0
     while e < len(triangle):
         if e < edges[e]:
-            start = triangle_center(points, triangle, triangle_of_edge(e))
-            end = triangle_center(points, triangle, triangle_of_edge(edges[e]))
+            start = center_of_triangle(centers, triangle_of_edge(e))
+            end = center_of_triangle(centers, triangle_of_edge(edges[e]))
             next_func(e, start, end)
         e += 1
 
 
-def for_each_voronoi_cell(points, edges, triangles, next_func):
-    index = {}
-    e = 0
-    while e < len(triangles):
-        endpoint = triangles[next_half_edge(e)]
-        if endpoint not in index or edges[e] == -1:
-            index[endpoint] = e
-        e += 1
+def for_each_voronoi_cell(points, edges, triangles, next_func, centers=None, inedges=None):
+    if centers is None:
+        centers = find_triangle_centers(points, triangles)
+    if inedges is None:
+        inedges = find_inedges(edges, triangles, len(points))
     p = 0
     while p < len(points):
-        incoming = index[p]
-        edge = edges_around_point(edges, incoming)
-        triangle = map(triangle_of_edge, edge)
-        vertices = list(map(lambda t: triangle_center(points, triangles, t), triangle))
-        next_func([p, vertices])
+        incoming = inedges[p]
+        if incoming != -1:  # skipped near-duplicates have no cell
+            edge = edges_around_point(edges, incoming)
+            triangle = map(triangle_of_edge, edge)
+            vertices = list(map(lambda t: center_of_triangle(centers, t), triangle))
+            next_func([p, vertices])
         p += 1
 
 
-# ---- VORONOI DATA CLASSES ---- #
-def find_each_voronoi_cell(points, edges, triangles):
-    data = []
-    index = {}
+# ---- BULK EXPORTS ---- #
+def find_triangle_segments(points, edges, triangles):
+    """
+    Every unique Delaunay edge, for uploading to a line buffer in one go.
+    :return: a flat float32 array('f') of [x0, y0, x1, y1, ...] segments.
+    """
+    segments = array('f')
     e = 0
     while e < len(triangles):
-        endpoint = triangles[next_half_edge(e)]
-        if endpoint not in index or edges[e] == -1:
-            index[endpoint] = e
+        if e > edges[e]:
+            segments.extend(points[triangles[e]])
+            segments.extend(points[triangles[next_half_edge(e)]])
+        e += 1
+
+    return segments
+
+
+def find_voronoi_segments(edges, centers):
+    """
+    Every Voronoi edge between two circumcenters, for uploading to a line buffer in one go.
+    :return: a flat float32 array('f') of [x0, y0, x1, y1, ...] segments.
+    """
+    segments = array('f')
+    e = 0
+    while e < len(edges):
+        if e < edges[e]:
+            segments.extend(center_of_triangle(centers, triangle_of_edge(e)))
+            segments.extend(center_of_triangle(centers, triangle_of_edge(edges[e])))
         e += 1
+
+    return segments
+
+
+# ---- VORONOI DATA CLASSES ---- #
+def find_each_voronoi_cell(points, edges, triangles, centers=None, inedges=None):
+    data = []
+    for_each_voronoi_cell(points, edges, triangles, data.append, centers, inedges)
+    return data
+
+
+def find_voronoi_cells(points, edges, triangles, centers=None, inedges=None):
+    """
+    Build every Voronoi cell at once in a compact VoronoiCells, rather than a list of vertex lists.
+    Skipped near-duplicate points get an empty cell.
+    """
+    if centers is None:
+        centers = find_triangle_centers(points, triangles)
+    if inedges is None:
+        inedges = find_inedges(edges, triangles, len(points))
+
+    offsets = array('i', [0]) * (len(points) + 1)
+    values = array('i')
     p = 0
     while p < len(points):
-        incoming = index[p]
-        edge = edges_around_point(edges, incoming)
-        triangle = map(triangle_of_edge, edge)
-        vertices = list(map(lambda t: triangle_center(points, triangles, t), triangle))
-        data.append([p, vertices])
+        start = incoming = inedges[p]
+        while incoming != -1:
+            values.append(incoming // 3)
+            incoming = edges[next_half_edge(incoming)]
+            if incoming == start:
+                break
         p += 1
+        offsets[p] = len(values)
+
+    return VoronoiCells(offsets, values, centers)
+
+
+class CSR:
+    """
+    Rows of ints packed into two flat arrays (compressed sparse rows):
+    row r is values[offsets[r]:offsets[r + 1]].
+    """
+
+    def __init__(self, offsets, values):
+        self.offsets: array = offsets
+        self.values: array = values
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, r):
+        """
+        :param r: a row index, or a slice of rows.
+        :return: a memoryview of the row, or a CSR sharing the values of the rows, neither copies the values.
+        """
+        if isinstance(r, slice):
+            start, stop, step = r.indices(len(self))
+            if step != 1:
+                raise ValueError("CSR rows can only be sliced contiguously")
+            return self.__class__(self.offsets[start:max(start, stop) + 1], self.values)
+        if r < 0:
+            r += len(self)
+        if not 0 <= r < len(self):
+            raise IndexError("CSR row index out of range")
+        return memoryview(self.values)[self.offsets[r]:self.offsets[r + 1]]
+
+    def __iter__(self):
+        values = memoryview(self.values)
+        offsets = self.offsets
+        for r in range(len(self)):
+            yield values[offsets[r]:offsets[r + 1]]
+
+    def row_length(self, r):
+        return self.offsets[r + 1] - self.offsets[r]
+
+
+class VoronoiCells(CSR):
+    """
+    The Voronoi cell of every site as a CSR of the triangles (circumcenter indices) around it.
+    """
+
+    def __init__(self, offsets, values, centers):
+        super().__init__(offsets, values)
+        self.centers: array = centers
+
+    def __getitem__(self, r):
+        if isinstance(r, slice):
+            start, stop, step = r.indices(len(self))
+            if step != 1:
+                raise ValueError("CSR rows can only be sliced contiguously")
+            return self.__class__(self.offsets[start:max(start, stop) + 1], self.values, self.centers)
+        return super().__getitem__(r)
+
+    def polygon(self, p):
+        return [center_of_triangle(self.centers, t) for t in self[p]]
+
+    def polygons(self):
+        """
+        :return: [p, vertices] pairs, in the same form as find_each_voronoi_cell.
+        """
+        for p in range(len(self)):
+            yield [p, self.polygon(p)]
+
+
+class ClippedCells(CSR):
+    """
+    Closed cell polygons clipped to a rectangle, as a CSR of flat [x0, y0, x1, y1, ...] coordinates:
+    offsets count coordinates rather than vertices, so clipped[p] is a view of the interleaved polygon of site p.
+    """
+
+    def __init__(self, offsets, values, areas, centroids):
+        super().__init__(offsets, values)
+        self.areas: array = areas
+        self.centroids: array = centroids
+
+    def __getitem__(self, r):
+        if isinstance(r, slice):
+            raise ValueError("ClippedCells can not be sliced, slice .offsets and .values directly")
+        return super().__getitem__(r)
+
+    def polygon(self, p):
+        coords = self[p]
+        return [(coords[i], coords[i + 1]) for i in range(0, len(coords), 2)]
+
+    def polygons(self):
+        """
+        :return: [p, vertices] pairs, in the same form as find_each_voronoi_cell.
+        """
+        for p in range(len(self)):
+            yield [p, self.polygon(p)]
+
+
+def clip_voronoi_cells(points, edges, triangles, inedges, cells, bounds=(-1, -1, 1, 1)):
+    """
+    Clip every Voronoi cell to a rectangle in one pass over the compact cells.
+    Cells already inside are copied straight through, the rest go through Sutherland-Hodgman.
+    Open cells on the hull are first closed off along their two outward rays, far enough out to lie past the bounds.
+    :param bounds: the (left, bottom, right, top) rectangle to clip to.
+    :return: a ClippedCells of the closed polygons, with the area and centroid of every cell.
+    """
+    left, bottom, right, top = bounds
+    middle_x = (left + right) / 2
+    middle_y = (bottom + top) / 2
+    diagonal = math.hypot(right - left, top - bottom)
+
+    offsets = array('i', [0]) * (len(cells) + 1)
+    values = array('d')
+    areas = array('d', [0]) * len(cells)
+    centroids = array('d', [0]) * (2 * len(cells))
+    cell_offsets = cells.offsets
+    cell_values = cells.values
+    centers = cells.centers
+
+    for p in range(len(cells)):
+        polygon = []
+        inside = True
+        for k in range(cell_offsets[p], cell_offsets[p + 1]):
+            t = cell_values[k]
+            x = centers[2 * t]
+            y = centers[2 * t + 1]
+            polygon.append(x)
+            polygon.append(y)
+            inside = inside and left <= x <= right and bottom <= y <= top
+
+        start = inedges[p]
+        if polygon and edges[start] == -1:
+            # a hull cell: add the rays along the bisectors of the two hull edges at p, pointing out of the hull
+            last = cell_values[cell_offsets[p + 1] - 1]
+            outgoing = next(e for e in edges_of_triangle(last) if triangles[e] == p and edges[e] == -1)
+            first_x, first_y = _outward_normal(points, triangles, start)
+            last_x, last_y = _outward_normal(points, triangles, outgoing)
+
+            x0, y0 = polygon[0], polygon[1]
+            x1, y1 = polygon[-2], polygon[-1]
+            far = 4 * (diagonal + math.hypot(x0 - middle_x, y0 - middle_y) + math.hypot(x1 - middle_x, y1 - middle_y))
+
+            # closed through a third point along the bisector of the two rays, so the closing edges stay out of bounds
+            # even when the rays are nearly opposite
+            bisector_x = first_x + last_x
+            bisector_y = first_y + last_y
+            length = math.hypot(bisector_x, bisector_y)
+            polygon = [x0 + far * first_x, y0 + far * first_y] + polygon + [x1 + far * last_x, y1 + far * last_y]
+            if length:
+                polygon.append((x0 + x1) / 2 + far * bisector_x / length)
+                polygon.append((y0 + y1) / 2 + far * bisector_y / length)
+            inside = False
+
+        if not inside:
+            polygon = _clip_half_plane(polygon, 0, left, 1)
+            polygon = _clip_half_plane(polygon, 0, right, -1)
+            polygon = _clip_half_plane(polygon, 1, bottom, 1)
+            polygon = _clip_half_plane(polygon, 1, top, -1)
+
+        area = 0
+        centroid_x = 0
+        centroid_y = 0
+        if polygon:
+            x0 = polygon[-2]
+            y0 = polygon[-1]
+            for i in range(0, len(polygon), 2):
+                x1 = polygon[i]
+                y1 = polygon[i + 1]
+                cross = x0 * y1 - x1 * y0
+                area += cross
+                centroid_x += (x0 + x1) * cross
+                centroid_y += (y0 + y1) * cross
+                x0 = x1
+                y0 = y1
+
+        if area:
+            centroids[2 * p] = centroid_x / (3 * area)
+            centroids[2 * p + 1] = centroid_y / (3 * area)
+        else:
+            # skipped, degenerate or entirely out of bounds, the site stays put
+            centroids[2 * p], centroids[2 * p + 1] = points[p]
+        areas[p] = abs(area) / 2
+
+        values.extend(polygon)
+        offsets[p + 1] = len(values)
+
+    return ClippedCells(offsets, values, areas, centroids)
+
+
+def _outward_normal(points, triangles, e):
+    """
+    The unit normal of hull edge e, pointing away from the third point of its triangle.
+    """
+    ax, ay = points[triangles[e]]
+    bx, by = points[triangles[next_half_edge(e)]]
+    cx, cy = points[triangles[prev_half_edge(e)]]
+    nx = ay - by
+    ny = bx - ax
+    if nx * (cx - ax) + ny * (cy - ay) > 0:
+        nx = -nx
+        ny = -ny
+    length = math.hypot(nx, ny)
+    return nx / length, ny / length
 
-    return data
+
+def _clip_half_plane(polygon, axis, limit, sign):
+    """
+    One Sutherland-Hodgman pass, keeping the part of a flat [x0, y0, ...] polygon where sign * (coord - limit) >= 0.
+    :param axis: 0 to clip against x = limit, 1 for y = limit.
+    """
+    clipped = []
+    if not polygon:
+        return clipped
+
+    previous_x = polygon[-2]
+    previous_y = polygon[-1]
+    previous_in = sign * (polygon[axis - 2] - limit) >= 0
+    for i in range(0, len(polygon), 2):
+        x = polygon[i]
+        y = polygon[i + 1]
+        current_in = sign * (polygon[i + axis] - limit) >= 0
+        if current_in != previous_in:
+            if axis:
+                t = (limit - previous_y) / (y - previous_y)
+                clipped.append(previous_x + t * (x - previous_x))
+                clipped.append(limit)
+            else:
+                t = (limit - previous_x) / (x - previous_x)
+                clipped.append(limit)
+                clipped.append(previous_y + t * (y - previous_y))
+        if current_in:
+            clipped.append(x)
+            clipped.append(y)
+        previous_x = x
+        previous_y = y
+        previous_in = current_in
+
+    return clipped
+
+
+def find_point_neighbours(edges, triangles, inedges):
+    """
+    The sites adjacent to every site in the triangulation, walked once from inedges.
+    :return: a CSR indexed by site, skipped near-duplicates have no neighbours.
+    """
+    offsets = array('i', [0]) * (len(inedges) + 1)
+    values = array('i')
+    p = 0
+    while p < len(inedges):
+        start = incoming = inedges[p]
+        while incoming != -1:
+            values.append(triangles[incoming])
+            outgoing = next_half_edge(incoming)
+            incoming = edges[outgoing]
+            if incoming == -1:
+                # a hull site, the last neighbour is at the end of the outgoing hull edge
+                values.append(triangles[next_half_edge(outgoing)])
+            elif incoming == start:
+                break
+        p += 1
+        offsets[p] = len(values)
+
+    return CSR(offsets, values)
+
+
+def find_vertex_neighbours(edges):
+    """
+    The Voronoi vertices (triangles) adjacent to every Voronoi vertex.
+    :return: a CSR indexed by triangle.
+    """
+    offsets = array('i', [0]) * (len(edges) // 3 + 1)
+    values = array('i')
+    t = 0
+    while t < len(edges) // 3:
+        for e in edges_of_triangle(t):
+            if edges[e] != -1:
+                values.append(triangle_of_edge(edges[e]))
+        t += 1
+        offsets[t] = len(values)
+
+    return CSR(offsets, values)
 
 
 class VoronoiVertex:
+    """
+    A view of Voronoi vertex (triangle) index in the columns of a VoronoiMap, it holds no data of its own.
+    """
+    __slots__ = ('map', 'index')
+
+    def __init__(self, index, voronoi_map):
+        self.map = voronoi_map
+        self.index: int = index
+
+    def __eq__(self, other):
+        return isinstance(other, VoronoiVertex) and self.map is other.map and self.index == other.index
 
-    def __init__(self, pos, neighbors):
-        self.parent_points: list
-        self.position: list[float, float] = pos
-        self.neighbors: list[VoronoiVertex] = neighbors
-        self.elevation: float = 0
-        self.moisture: float = 0
+    def __hash__(self):
+        return hash((id(self.map), self.index))
+
+    @property
+    def position(self):
+        return center_of_triangle(self.map.centers, self.index)
+
+    @property
+    def elevation(self):
+        return self.map.vertex_elevation[self.index]
+
+    @elevation.setter
+    def elevation(self, value):
+        self.map.vertex_elevation[self.index] = value
+
+    @property
+    def moisture(self):
+        return self.map.vertex_moisture[self.index]
+
+    @moisture.setter
+    def moisture(self, value):
+        self.map.vertex_moisture[self.index] = value
+
+    @property
+    def parent_points(self):
+        return [VoronoiPoint(p, self.map) for p in points_of_triangle(self.map.triangles, self.index)]
+
+    @property
+    def neighbors(self):
+        return [VoronoiVertex(t, self.map) for t in self.map.vertex_neighbours[self.index]]
 
 
 class VoronoiPoint:
+    """
+    A view of site index in the columns of a VoronoiMap, it holds no data of its own.
+    """
+    __slots__ = ('map', 'index')
 
-    def __init__(self, pos, voronoi_map):
+    def __init__(self, index, voronoi_map):
         self.map = voronoi_map
-        self._position: list[float, float] = pos
-        self._voronoi_vertices: list[VoronoiVertex] = []
-        self._point_neighbors: list[VoronoiPoint] = []
-        self._buffer_polygons: list[list[float, float]] = []
+        self.index: int = index
 
-    def update_vertices(self):
-        pass
+    def __eq__(self, other):
+        return isinstance(other, VoronoiPoint) and self.map is other.map and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.map), self.index))
 
     @property
     def pos(self):
-        return self._position
+        return self.map.point_position(self.index)
 
     @pos.setter
     def pos(self, value):
-        self._position = value
-        self.map.update()
-        self.update_vertices()
+        self.map.move_point(self.index, value[0], value[1])
 
     @property
     def screen_pos(self):
-        return expand2d(*self._position)
+        return expand2d(*self.pos)
 
     @screen_pos.setter
     def screen_pos(self, value):
@@ -193,66 +714,447 @@ class VoronoiPoint:
 
     @property
     def x(self):
-        return self._position[0]
+        return self.map.point_position(self.index)[0]
 
     @property
     def y(self):
-        return  self._position[1]
+        return self.map.point_position(self.index)[1]
+
+    @property
+    def elevation(self):
+        return self.map.point_elevation[self.index]
+
+    @elevation.setter
+    def elevation(self, value):
+        self.map.point_elevation[self.index] = value
+
+    @property
+    def moisture(self):
+        return self.map.point_moisture[self.index]
+
+    @moisture.setter
+    def moisture(self, value):
+        self.map.point_moisture[self.index] = value
+
+    @property
+    def voronoi_vertices(self):
+        return [VoronoiVertex(t, self.map) for t in self.map.cells[self.index]]
 
     @property
     def neighbours(self):
-        if not len(self._point_neighbors):
-            pass
-        return self._point_neighbors
+        return [VoronoiPoint(p, self.map) for p in self.map.point_neighbours[self.index]]
+
+
+class VoronoiViews:
+    """
+    A read only sequence of VoronoiPoint or VoronoiVertex views, made on demand rather than kept in a list.
+    """
+
+    def __init__(self, view, voronoi_map, count):
+        self.view = view
+        self.map = voronoi_map
+        self.count = count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        return self.view(i % len(self), self.map)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.view(i, self.map)
 
 
 class VoronoiMap:
     resolution = 4
+    relax_iterations = 3
+    relax_tolerance = 0
+    site_generator = 'grid'
+    # Poisson-disk spacing, in multiples of resolution, that gives about as many sites as the grid
+    poisson_spacing = 0.8
+    poisson_relax_iterations = 0
+    # fBm octaves of the elevation and moisture noise
+    noise_octaves = 8
+    bounds = (-1, -1, 1, 1)
+    # past this fraction of the sites moved in one edit, re-triangulating once beats patching each move in
+    edit_rebuild_fraction = 0.03
 
     def __init__(self):
-        self.points = []
-        self.points_coords = {}
+        self.coords = array('d')
+        self.points = FlatPoints(self.coords)
+        self.grid_rows = 0
         self.edges = []
         self.triangles = []
-        self.voronoi_points: list[VoronoiPoint] = []
-        self.voronoi_vertices: list[VoronoiVertex] = []
+        self.centers = array('d')
+        self.inedges = array('i')
+
+        # site and Voronoi vertex attributes are stored as columns, VoronoiPoint and VoronoiVertex only view them
+        self.point_elevation = array('d')
+        self.point_moisture = array('d')
+        self.vertex_elevation = array('d')
+        self.vertex_moisture = array('d')
+        self.elevation_tree: PerlinTree = None
+        self.moisture_tree: PerlinTree = None
+        self.voronoi_points = VoronoiViews(VoronoiPoint, self, lambda: len(self.points))
+        self.voronoi_vertices = VoronoiViews(VoronoiVertex, self, lambda: len(self.triangles) // 3)
+
+        self.delaunator: Delaunator = None
+        # bumped whenever the triangulation changes, so views can tell their buffers are stale
+        self.revision = 0
+        self._pending: dict = None
+        self._cells: VoronoiCells = None
+        self._clipped_cells: ClippedCells = None
+        self._point_neighbours: CSR = None
+        self._vertex_neighbours: CSR = None
 
-    def load_map(self):
-        self.points = []
-        self.points_coords = {}
+    def load_map(self, generator=None, density=None):
+        """
+        Generate the sites, triangulate them and relax the cells.
+        :param generator: 'grid' for one jittered site per resolution sized cell, relaxed relax_iterations times,
+        or 'poisson' for Poisson-disk sites about resolution pixels apart, relaxed poisson_relax_iterations times.
+        Defaults to site_generator.
+        :param density: for 'poisson', an optional function of the map (x, y) returning a value in (0, 1],
+        lower values give sparser sites.
+        """
+        generator = generator or self.site_generator
+        self.coords = array('d')
+        self.points = FlatPoints(self.coords)
+        self.grid_rows = 0
         self.edges = []
         self.triangles = []
-        self.voronoi_points: list[VoronoiPoint] = []
+        self.centers = array('d')
+        self.delaunator = None
+        self._pending = None
+        # no noise is sampled until the sites have settled
+        self.elevation_tree = None
+        self.moisture_tree = None
 
+        if generator == 'grid':
+            self._load_grid_points()
+            relax_iterations = self.relax_iterations
+        elif generator == 'poisson':
+            self._load_poisson_points(density)
+            relax_iterations = self.poisson_relax_iterations
+        else:
+            raise ValueError("unknown site generator {!r}".format(generator))
+
+        self.point_elevation = array('d', [0]) * len(self.points)
+        self.point_moisture = array('d', [0]) * len(self.points)
+
+        # use centroids to spread out the voronoi sectors
+        self.triangulate()
+        self.relax(relax_iterations, self.relax_tolerance)
+
+        self.elevation_tree = PerlinTree(depth=self.noise_octaves - 1)
+        self.moisture_tree = PerlinTree(depth=self.noise_octaves - 1)
+        self.update_noise()
+
+    def _load_grid_points(self):
+        self.grid_rows = math.ceil(SCREEN_HEIGHT / self.resolution)
         normal_resolution_width = (2 * self.resolution) / SCREEN_WIDTH
         normal_resolution_height = (2 * self.resolution) / SCREEN_HEIGHT
 
-        # Generate the base set of points
-        for x in range(0, SCREEN_WIDTH // normal_resolution_width+1):
-            for y in range(0, SCREEN_HEIGHT // normal_resolution_height+1):
+        # Generate the base set of points, the last column and row are cut short at the map edge
+        for x in range(0, math.ceil(SCREEN_WIDTH / self.resolution)):
+            for y in range(0, self.grid_rows):
                 low_x = 2 * (x * self.resolution) / SCREEN_WIDTH - 1
                 low_y = 2 * (y * self.resolution) / SCREEN_HEIGHT - 1
-                point = [random.uniform(low_x, low_x + normal_resolution_width),
-                         random.uniform(low_y, low_y + normal_resolution_height)]
-                voronoi_point = VoronoiPoint(point, self)
-                self.points.append(point)
-                self.voronoi_points.append(voronoi_point)
-                self.points_coords[x, y] = len(self.points)-1
+                self.coords.append(random.uniform(low_x, min(low_x + normal_resolution_width, 1)))
+                self.coords.append(random.uniform(low_y, min(low_y + normal_resolution_height, 1)))
 
-        # use centroids to spread out the voronoi sectors
-        for i in range(3):
-            self.triangles = Delaunator(self.points).triangles
-            self.edges = Delaunator(self.points).halfedges
-            voronoi = find_each_voronoi_cell(self.points, self.edges, self.triangles)
-            for voronoi in voronoi:
-                centroid = find_centroid(voronoi[1])
-                point = self.points[voronoi[0]]
-                point[0] = centroid[0]
-                point[1] = centroid[1]
-
-        self.triangles = Delaunator(self.points).triangles
-        self.edges = Delaunator(self.points).halfedges
+    def _load_poisson_points(self, density=None):
+        # sampled in pixels so the spacing is the same across and up the screen, then shrunk to the map
+        screen_density = None
+        if density is not None:
+            screen_density = lambda x, y: density(*shrink2d(x, y))
+        pixels = poisson_disk_points((0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), self.poisson_spacing * self.resolution,
+                                     screen_density)
+        for i in range(0, len(pixels), 2):
+            self.coords.append(2 * pixels[i] / SCREEN_WIDTH - 1)
+            self.coords.append(2 * pixels[i + 1] / SCREEN_HEIGHT - 1)
+
+    def grid_point(self, x, y):
+        """
+        The site generated in grid cell (x, y) by load_map.
+        :raise ValueError: if the sites did not come from the grid generator.
+        """
+        if not self.grid_rows:
+            raise ValueError("the map's sites were not generated on a grid")
+        return x * self.grid_rows + y
+
+    def relax(self, iterations, tolerance=0):
+        """
+        Lloyd relaxation: move every site to the area centroid of its cell, clipped to the map bounds,
+        and re-triangulate. Elevation and moisture are re-sampled once, after the last pass.
+        :param iterations: the most passes to make.
+        :param tolerance: stop once no site moves further than this in a pass.
+        :return: a (max displacement, seconds) tuple for every pass made.
+        """
+        report = []
+        for i in range(iterations):
+            start = time.perf_counter()
+            centroids = self.clipped_cells.centroids
+
+            displacement = 0
+            coords = self.coords
+            for c in range(0, len(centroids), 2):
+                dx = centroids[c] - coords[c]
+                dy = centroids[c + 1] - coords[c + 1]
+                displacement = max(displacement, dx * dx + dy * dy)
+
+            coords[0:len(centroids)] = centroids
+            self.triangulate()
+            report.append((math.sqrt(displacement), time.perf_counter() - start))
+
+            if math.sqrt(displacement) <= tolerance:
+                break
+
+        # sampled once the sites have settled, not on every pass
+        if report:
+            self.update_noise()
+        return report
+
+    def triangulate(self):
+        """
+        Triangulate the current points, reusing the map's Delaunator (and its buffers) when there is one.
+        The vertex columns come back zeroed, update and relax re-sample the noise once they are done.
+        """
+        if self.delaunator is None:
+            self.delaunator = Delaunator.from_flat(self.coords)
+        else:
+            self.delaunator.update(self.coords)
+        self.triangles = self.delaunator.triangles
+        self.edges = self.delaunator.halfedges
+        self.centers = find_triangle_centers(self.points, self.triangles, centers=self.centers)
+        self.inedges = self.delaunator.findInedges()
+        self._reset_vertex_columns()
+        self.revision += 1
+        self._cells = None
+        self._clipped_cells = None
+        self._point_neighbours = None
+        self._vertex_neighbours = None
+
+    def _reset_vertex_columns(self, changed=None):
+        """
+        Size the Voronoi vertex columns to the triangulation, zeroing the changed triangles (all of them if None),
+        as their ids no longer refer to the same circumcenters.
+        :return: True if every triangle was zeroed, because changed was None or the triangle count changed.
+        """
+        count = len(self.triangles) // 3
+        if changed is None or len(self.vertex_elevation) != count:
+            self.vertex_elevation = array('d', [0]) * count
+            self.vertex_moisture = array('d', [0]) * count
+            return True
+        for t in changed:
+            self.vertex_elevation[t] = 0
+            self.vertex_moisture[t] = 0
+        return False
+
+    def update_noise(self, sites=None, triangles=None):
+        """
+        Sample elevation and moisture, fBm of elevation_tree and moisture_tree scaled to [0, 1],
+        into the site and Voronoi vertex columns. Does nothing before load_map has made the trees.
+        :param sites: the sites to sample, all of them when None.
+        :param triangles: the Voronoi vertices (triangles) to sample, all of them when None.
+        """
+        if self.elevation_tree is None:
+            return
+        if sites is None:
+            sites = range(len(self.points))
+        if triangles is None:
+            triangles = range(len(self.triangles) // 3)
+        self._sample_noise(sites, self.coords, self.point_elevation, self.point_moisture)
+        self._sample_noise(triangles, self.centers, self.vertex_elevation, self.vertex_moisture)
+
+    def _sample_noise(self, indices, coords, elevation, moisture):
+        xs = array('d', [coords[2 * i] for i in indices])
+        ys = array('d', [coords[2 * i + 1] for i in indices])
+        elevations, moistures = fbm_2d_array([self.elevation_tree, self.moisture_tree], xs, ys,
+                                             octaves=self.noise_octaves)
+        for i, e, m in zip(indices, elevations, moistures):
+            elevation[i] = clamp((e + 1)/2, 0, 1)
+            moisture[i] = clamp((m + 1)/2, 0, 1)
+
+    @property
+    def cells(self):
+        """
+        The compact Voronoi cells of the current triangulation, built on first use.
+        """
+        if self._cells is None:
+            self._cells = find_voronoi_cells(self.points, self.edges, self.triangles, self.centers, self.inedges)
+        return self._cells
+
+    @property
+    def clipped_cells(self):
+        """
+        The Voronoi cells clipped to the map bounds, closed and with their areas, built on first use.
+        """
+        if self._clipped_cells is None:
+            self._clipped_cells = clip_voronoi_cells(self.points, self.edges, self.triangles, self.inedges,
+                                                     self.cells, self.bounds)
+        return self._clipped_cells
+
+    @property
+    def point_neighbours(self):
+        """
+        The site to site adjacency as a CSR, built on first use; point_neighbours[p] is a view of p's neighbours.
+        """
+        if self._point_neighbours is None:
+            self._point_neighbours = find_point_neighbours(self.edges, self.triangles, self.inedges)
+        return self._point_neighbours
+
+    @property
+    def vertex_neighbours(self):
+        """
+        The Voronoi vertex to vertex adjacency as a CSR, built on first use.
+        """
+        if self._vertex_neighbours is None:
+            self._vertex_neighbours = find_vertex_neighbours(self.edges)
+        return self._vertex_neighbours
+
+    def triangle_segments(self):
+        return find_triangle_segments(self.points, self.edges, self.triangles)
+
+    def voronoi_segments(self):
+        return find_voronoi_segments(self.edges, self.centers)
+
+    def move_point(self, p, x, y):
+        """
+        Move a single site, patching the triangulation locally rather than rebuilding it.
+        Only the triangulation, centers, inedges and noise columns are patched, the cells, clipped cells and
+        neighbour tables are rebuilt in full the next time they are read.
+        Between begin_edit() and commit() the move is only recorded.
+        :return: the ids of the triangles that changed, empty while editing.
+        """
+        if self._pending is not None:
+            self._pending[p] = (x, y)
+            return []
+
+        if self.delaunator is None:
+            self.coords[2 * p] = x
+            self.coords[2 * p + 1] = y
+            return []
+
+        changed = self.delaunator.move(p, x, y)
+        self._refresh(changed, [p])
+        return changed
+
+    def point_position(self, p):
+        """
+        The position of site p, including a move still waiting on commit().
+        """
+        if self._pending is not None and p in self._pending:
+            return self._pending[p]
+        return self.points[p]
+
+    def begin_edit(self):
+        """
+        Start collecting site moves, so a batch of them costs one update at commit() rather than one each.
+        """
+        if self._pending is None:
+            self._pending = {}
+
+    def commit(self):
+        """
+        Apply the moves collected since begin_edit().
+        A few moves away from the hull are patched in one at a time, anything larger is re-triangulated once.
+        Either way the cells, clipped cells and neighbour tables are rebuilt in full on their next read.
+        :return: the sorted ids of the sites and of the triangles affected, for updating data that depends on them.
+        """
+        pending = self._pending
+        self._pending = None
+        if not pending:
+            return [], []
+
+        if self.delaunator is not None and len(pending) <= self.edit_rebuild_fraction * len(self.points):
+            hull = set(self.delaunator.hull)
+            if not any(p in hull for p in pending):
+                changed = set()
+                for p, (x, y) in pending.items():
+                    changed.update(self.delaunator.move(p, x, y))
+                    if self.delaunator.inedges is None:
+                        break  # moved outside the hull and fell back to a full update
+                else:
+                    changed = sorted(changed)
+                    self._refresh(changed, list(pending))
+                    sites = set(pending)
+                    for t in changed:
+                        sites.update(points_of_triangle(self.triangles, t))
+                    return sorted(sites), changed
+
+        for p, (x, y) in pending.items():
+            self.coords[2 * p] = x
+            self.coords[2 * p + 1] = y
+        self.triangulate()
+        self.update_noise()
+        return list(range(len(self.points))), list(range(len(self.triangles) // 3))
+
+    def cancel_edit(self):
+        """
+        Drop the moves collected since begin_edit().
+        """
+        self._pending = None
+
+    @contextmanager
+    def editing(self):
+        """
+        begin_edit() and commit() as a with block, the moves are dropped if the block raises.
+        """
+        self.begin_edit()
+        try:
+            yield self
+        except BaseException:
+            self.cancel_edit()
+            raise
+        self.commit()
+
+    def _refresh(self, changed, sites):
+        """
+        Pick up an incremental change to the triangulation, recomputing only the data of the changed triangles
+        and of the moved sites.
+        The cell and neighbour CSRs are not patched, they are dropped and rebuilt in full on their next read.
+        """
+        self.triangles = self.delaunator.triangles
+        self.edges = self.delaunator.halfedges
+        self.centers = find_triangle_centers(self.points, self.triangles, changed, self.centers)
+        self.inedges = self.delaunator.findInedges()
+        if self._reset_vertex_columns(changed):
+            self.update_noise(sites, None)
+        else:
+            self.update_noise(sites, changed)
+        self.revision += 1
+        self._cells = None
+        self._clipped_cells = None
+        self._point_neighbours = None
+        self._vertex_neighbours = None
+
+    def edges_around_point(self, p):
+        """
+        The incoming half-edges around site p, found from the cached inedges without a search.
+        :return: the edges, empty if p was skipped as a near-duplicate.
+        """
+        incoming = self.inedges[p]
+        if incoming == -1:
+            return []
+        return edges_around_point(self.edges, incoming)
+
+    def locate(self, x, y):
+        """
+        Find the triangle and the Voronoi cell (the site nearest to the point) holding (x, y).
+        :return: the triangle id, -1 outside the hull, and the site index.
+        """
+        return self.delaunator.locate(x, y)
+
+    def locate_many(self, coords):
+        """
+        Locate every point of an interleaved [x0, y0, x1, y1, ...] buffer.
+        :return: an array of triangle ids and an array of site indices.
+        """
+        return self.delaunator.locateMany(coords)
 
     def update(self):
-        self.edges = Delaunator(self.points).halfedges
-        self.triangles = Delaunator(self.points).triangles
+        self.triangulate()
+        self.update_noise()